@@ -7,6 +7,7 @@ def process_file(filename):
         print(f"Error: '{filename}' is not a valid .lit file.")
         return
 
+    text = None
     try:
         downloads_folder = Path.home() / "Downloads"
         input_filepath = downloads_folder / filename
@@ -15,16 +16,18 @@ def process_file(filename):
             print(f"\nError: The file '{input_filepath}' does not exist in the Downloads folder.")
             return
 
-        with open(input_filepath, 'r') as file:
-            text = file.read()
+        # ASCII sources are memory-mapped and lexed in place by the DFA engine.
+        text = tokenizer.read_source(input_filepath)
+        engine = 'dfa' if isinstance(text, tokenizer.MappedSource) else 'char'
 
-        tokens, errors = tokenizer.run(filename, text)
+        tokens, errors = tokenizer.run(filename, text, engine)
 
         output_filename = downloads_folder / filename.replace('.lit', '_output.txt')
 
         with open(output_filename, 'w') as output_file:
             output_file.write("--------------- Input ---------------\n")
-            output_file.write(text + "\n\n")
+            tokenizer.write_source(output_file, text)
+            output_file.write("\n\n")
 
             output_file.write("----------- Tokens Table ------------\n")
             token_table = PrettyTable()
@@ -62,6 +65,9 @@ def process_file(filename):
         print(f"Error: The file '{filename}' does not exist.")
     except Exception as e:
         print(f"Error: {e}")
+    finally:
+        if isinstance(text, tokenizer.MappedSource):
+            text.close()
 
 if __name__ == '__main__':
     filename = input("Enter the .lit file name from the Downloads folder: ")
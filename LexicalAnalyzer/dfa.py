@@ -0,0 +1,315 @@
+#######################################
+#          DFA TABLE COMPILER         #
+#######################################
+
+# Compiles a declarative token specification, a list of (rule name, pattern)
+# pairs, into a minimized DFA stored as flat array tables. Patterns use a small
+# regular expression subset: literals, '.', character classes ('[a-z]',
+# '[^#]'), grouping, '|', and the '*', '+' and '?' quantifiers.
+#
+# Scanning uses maximal munch: the longest match wins and, among matches of
+# the same length, the rule listed first in the specification.
+#
+# Like tokenizer.py, this module is kept as an identical copy in both
+# LexicalAnalyzer/ and SyntaxAnalyzer/ so each analyzer runs on its own. It
+# holds no token rules: each tokenizer passes its own spec to compile_dfa.
+
+from array import array
+import codecs
+
+OTHER = 128  # every character outside ASCII shares this code
+ALPHABET = frozenset(range(OTHER + 1))
+ESCAPES = {'n': '\n', 't': '\t', 'v': '\v', 'r': '\r', 'f': '\f', '0': '\0'}
+
+
+def _other_char(error):
+    return '\x80' * (error.end - error.start), error.end
+
+codecs.register_error('dfa-other', _other_char)
+
+#######################################
+#           PATTERN PARSER            #
+#######################################
+
+class PatternError(Exception):
+    def __init__(self, pattern, details):
+        super().__init__(f"Invalid token pattern {pattern!r}: {details}")
+        self.pattern = pattern
+        self.details = details
+
+
+class PatternParser:
+    """Parses a pattern into nested tuples: ('set', codes), ('cat', a, b), ('alt', a, b), ('star', a), ('opt', a), ('empty',)."""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.idx = 0
+
+    def parse(self):
+        node = self.alternation()
+        if self.idx != len(self.pattern):
+            raise PatternError(self.pattern, f"unexpected '{self.pattern[self.idx]}' at {self.idx}")
+        return node
+
+    def peek(self):
+        return self.pattern[self.idx] if self.idx < len(self.pattern) else None
+
+    def alternation(self):
+        node = self.concatenation()
+        while self.peek() == '|':
+            self.idx += 1
+            node = ('alt', node, self.concatenation())
+        return node
+
+    def concatenation(self):
+        node = ('empty',)
+        while self.peek() is not None and self.peek() not in '|)':
+            item = self.repetition()
+            node = item if node == ('empty',) else ('cat', node, item)
+        return node
+
+    def repetition(self):
+        node = self.atom()
+        while self.peek() is not None and self.peek() in '*+?':
+            op = self.pattern[self.idx]
+            self.idx += 1
+            if op == '*':
+                node = ('star', node)
+            elif op == '+':
+                node = ('cat', node, ('star', node))
+            else:
+                node = ('opt', node)
+        return node
+
+    def atom(self):
+        char = self.pattern[self.idx]
+        self.idx += 1
+        if char == '(':
+            node = self.alternation()
+            if self.peek() != ')':
+                raise PatternError(self.pattern, "missing ')'")
+            self.idx += 1
+            return node
+        if char == '[':
+            return ('set', self.char_class())
+        if char == '.':
+            return ('set', ALPHABET)
+        if char == '\\':
+            return ('set', frozenset([ord(self.escaped())]))
+        if char in '*+?)':
+            raise PatternError(self.pattern, f"nothing to repeat before '{char}'")
+        return ('set', frozenset([self.code(char)]))
+
+    def escaped(self):
+        if self.idx >= len(self.pattern):
+            raise PatternError(self.pattern, "trailing backslash")
+        char = self.pattern[self.idx]
+        self.idx += 1
+        return ESCAPES.get(char, char)
+
+    def char_class(self):
+        negate = self.peek() == '^'
+        if negate:
+            self.idx += 1
+        codes = set()
+        first = True
+        while True:
+            char = self.peek()
+            if char is None:
+                raise PatternError(self.pattern, "missing ']'")
+            if char == ']' and not first:
+                self.idx += 1
+                break
+            first = False
+            self.idx += 1
+            if char == '\\':
+                char = self.escaped()
+            if self.peek() == '-' and self.idx + 1 < len(self.pattern) and self.pattern[self.idx + 1] != ']':
+                self.idx += 1
+                end = self.pattern[self.idx]
+                self.idx += 1
+                if end == '\\':
+                    end = self.escaped()
+                codes.update(range(self.code(char), self.code(end) + 1))
+            else:
+                codes.add(self.code(char))
+        return ALPHABET - codes if negate else frozenset(codes)
+
+    def code(self, char):
+        if ord(char) >= OTHER:
+            raise PatternError(self.pattern, "only ASCII characters can be named in a pattern")
+        return ord(char)
+
+#######################################
+#               COMPILER              #
+#######################################
+
+class NFA:
+    def __init__(self):
+        self.edges = []      # per state: list of (codes, target)
+        self.epsilon = []    # per state: list of targets
+        self.accepts = {}    # state -> rule index
+
+    def new_state(self):
+        self.edges.append([])
+        self.epsilon.append([])
+        return len(self.edges) - 1
+
+    def build(self, node):
+        """Thompson construction; returns the (start, end) states of node."""
+        kind = node[0]
+        start = self.new_state()
+        if kind == 'set':
+            end = self.new_state()
+            self.edges[start].append((node[1], end))
+        elif kind == 'empty':
+            end = start
+        elif kind == 'cat':
+            first_start, first_end = self.build(node[1])
+            second_start, end = self.build(node[2])
+            self.epsilon[start].append(first_start)
+            self.epsilon[first_end].append(second_start)
+        elif kind == 'alt':
+            end = self.new_state()
+            for child in node[1:]:
+                child_start, child_end = self.build(child)
+                self.epsilon[start].append(child_start)
+                self.epsilon[child_end].append(end)
+        else:
+            end = self.new_state()
+            child_start, child_end = self.build(node[1])
+            self.epsilon[start] += [child_start, end]
+            self.epsilon[child_end].append(end)
+            if kind == 'star':
+                self.epsilon[child_end].append(child_start)
+        return start, end
+
+    def closure(self, states):
+        stack = list(states)
+        seen = set(states)
+        while stack:
+            for target in self.epsilon[stack.pop()]:
+                if target not in seen:
+                    seen.add(target)
+                    stack.append(target)
+        return frozenset(seen)
+
+
+class DFA:
+    """
+    A compiled token specification.
+
+    transitions[row + class] is the row of the next state, where a row is a
+    state number times class_count and row 0 is the dead state. accepts is
+    indexed by row as well: accepts[row] is 1 + the index of the rule the
+    state accepts, or 0. Accepting states are numbered last, so a row accepts
+    exactly when it is at least accept_start.
+    """
+
+    def __init__(self, rules, transitions, accepts, accept_start, class_table, class_count, start):
+        self.rules = rules
+        self.transitions = transitions
+        self.accepts = accepts
+        self.accept_start = accept_start
+        self.class_table = class_table
+        self.class_count = class_count
+        self.start = start
+
+    def classify(self, text):
+        """Maps every character of text to its equivalence class, as bytes."""
+        return text.encode('latin-1', 'dfa-other').translate(self.class_table)
+
+    def match(self, classes, idx):
+        """Returns (rule index, end) of the longest match at idx, or (None, idx) if nothing matches."""
+        transitions = self.transitions
+        accepts = self.accepts
+        state = self.start
+        rule, end = None, idx
+        for i in range(idx, len(classes)):
+            state = transitions[state + classes[i]]
+            if not state:
+                break
+            accepted = accepts[state]
+            if accepted:
+                rule, end = accepted - 1, i + 1
+        return rule, end
+
+
+def compile_dfa(spec):
+    """Compiles [(rule name, pattern), ...] into a minimized DFA."""
+    nfa = NFA()
+    start = nfa.new_state()
+    for rule_index, (name, pattern) in enumerate(spec):
+        rule_start, rule_end = nfa.build(PatternParser(pattern).parse())
+        nfa.epsilon[start].append(rule_start)
+        nfa.accepts[rule_end] = rule_index
+
+    # Characters that no pattern tells apart share one equivalence class.
+    code_sets = {codes for edges in nfa.edges for codes, _ in edges}
+    signatures = {}
+    class_of = [signatures.setdefault(tuple(code in codes for codes in code_sets), len(signatures))
+                for code in range(OTHER + 1)]
+    class_count = len(signatures)
+    class_edges = [[(frozenset(class_of[code] for code in codes), target) for codes, target in edges]
+                   for edges in nfa.edges]
+
+    # Subset construction; DFA state 0 is the dead state.
+    start_set = nfa.closure([start])
+    dfa_states = [frozenset(), start_set]
+    numbering = {frozenset(): 0, start_set: 1}
+    moves = {0: [0] * class_count}
+    pending = [start_set]
+    while pending:
+        current = pending.pop()
+        row = [0] * class_count
+        for cls in range(class_count):
+            targets = [target for state in current for classes, target in class_edges[state] if cls in classes]
+            if not targets:
+                continue
+            target_set = nfa.closure(targets)
+            if target_set not in numbering:
+                numbering[target_set] = len(dfa_states)
+                dfa_states.append(target_set)
+                pending.append(target_set)
+            row[cls] = numbering[target_set]
+        moves[numbering[current]] = row
+    moves = [moves[index] for index in range(len(dfa_states))]
+
+    accepting = [min((nfa.accepts[state] for state in states if state in nfa.accepts), default=None)
+                 for states in dfa_states]
+
+    # Moore minimization: split blocks until equivalent states agree on every class.
+    block_of = [0 if index == 0 else (accepting[index] + 2 if accepting[index] is not None else 1)
+                for index in range(len(dfa_states))]
+    while True:
+        keys = {}
+        new_block_of = [keys.setdefault((block_of[index],) + tuple(block_of[target] for target in moves[index]), len(keys))
+                        for index in range(len(dfa_states))]
+        if len(keys) == len(set(block_of)):
+            break
+        block_of = new_block_of
+
+    if accepting[1] is not None:
+        raise PatternError(spec[accepting[1]][1], "matches the empty string")
+
+    # Renumber so the dead block is 0, the start block is 1 and the accepting
+    # blocks come last: a scanner can then spot an accepting state with one
+    # comparison against accept_start instead of a table lookup.
+    order = {block_of[0]: 0, block_of[1]: 1}
+    for index in sorted(range(len(dfa_states)), key=lambda index: accepting[index] is not None):
+        order.setdefault(block_of[index], len(order))
+    state_count = len(order)
+    accept_start = min((order[block_of[index]] for index in range(len(dfa_states)) if accepting[index] is not None),
+                       default=state_count) * class_count
+    transitions = array('I', [0]) * (state_count * class_count)
+    accepts = array('B', [0]) * (state_count * class_count)
+    for index in range(len(dfa_states)):
+        state = order[block_of[index]]
+        if accepting[index] is not None:
+            accepts[state * class_count] = accepting[index] + 1
+        for cls, target in enumerate(moves[index]):
+            transitions[state * class_count + cls] = order[block_of[target]] * class_count
+
+    class_table = bytes(class_of[min(code, OTHER)] for code in range(256))
+    return DFA(tuple(name for name, _ in spec), transitions, accepts, accept_start, class_table, class_count,
+               class_count)
@@ -1,4 +1,4 @@
-from tokenizer import Lexer
+from tokenizer import Lexer, MappedSource, read_source, write_source
 from parser import Parser
 from pathlib import Path
 from prettytable import PrettyTable
@@ -8,6 +8,7 @@ def process_file(filename):
         print(f"Error: '{filename}' is not a valid .lit file.")
         return
 
+    text = None
     try:
         downloads_folder = Path.home() / "Downloads"
         input_filepath = downloads_folder / filename
@@ -16,11 +17,12 @@ def process_file(filename):
             print(f"\nError: The file '{input_filepath}' does not exist in the Downloads folder.")
             return
 
-        with open(input_filepath, 'r') as file:
-            text = file.read()
+        # ASCII sources are memory-mapped and lexed in place by the DFA engine.
+        text = read_source(input_filepath)
+        engine = 'dfa' if isinstance(text, MappedSource) else 'char'
 
         # Tokenization
-        lexer = Lexer(filename, text)
+        lexer = Lexer(filename, text, engine)
         tokens, lexer_errors = lexer.make_tokens()
 
         if lexer_errors:
@@ -30,7 +32,8 @@ def process_file(filename):
 
             with open(output_filename, 'w') as output_file:
                 output_file.write("--------------- Input ---------------\n")
-                output_file.write(text + "\n\n")
+                write_source(output_file, text)
+                output_file.write("\n\n")
 
                 output_file.write("\n----------- Errors Table ------------\n")
                 
@@ -65,12 +68,14 @@ def process_file(filename):
 
         with open(output_filename, 'w') as output_file:
             output_file.write("--------------- Input ---------------\n")
-            output_file.write(text + "\n\n")
+            write_source(output_file, text)
+            output_file.write("\n\n")
 
             # Abstract Syntax Tree
             output_file.write("----------- Abstract Syntax Tree ------------\n")
             if ast:
-                output_file.write(str(ast) + "\n\n")
+                ast.write(output_file)
+                output_file.write("\n\n")
             else:
                 output_file.write("Failed to generate AST due to syntax errors.\n\n")
 
@@ -114,6 +119,9 @@ def process_file(filename):
         print(f"Error: The file '{filename}' does not exist.")
     except Exception as e:
         print(f"Error: {e}")
+    finally:
+        if isinstance(text, MappedSource):
+            text.close()
 
 if __name__ == '__main__':
     filename = input("Enter the .lit file name from the Downloads folder: ")
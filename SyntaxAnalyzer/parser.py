@@ -1,22 +1,58 @@
-from tokenizer import Lexer, Token
+from collections import deque
+from tokenizer import Error, Lexer, Token, TokenKind, lex_chunks
 
 class ASTNode:
+    # Slots instead of a per-node __dict__, and one shared empty tuple as the
+    # children of every leaf, keep large trees small.
+    __slots__ = ('type', 'value', 'children', 'pos_start', 'pos_end', 'span')
+
     def __init__(self, type_, value=None, children=None, pos_start=None, pos_end=None):
         self.type = type_
         self.value = value
-        self.children = children or []
+        self.children = children or ()
         self.pos_start = pos_start  # Track start position
         self.pos_end = pos_end      # Track end position
+        # (offset, length) in tokens, set on top-level statements and blocks.
+        # offset counts from the end of the previous sibling with a span, or
+        # from the first token of the parent with one, so a subtree's spans
+        # stay valid when an edit shifts it. See reparse().
+        self.span = None
 
     def __repr__(self, level=0, is_last=True):
-        indent = "    " * level
-        prefix = indent + ("└── " if is_last else "├── ")
-        value_str = str(self.value) if self.value is not None else ""
-        ret = f"{prefix}{self.type}: {value_str}\n"
+        return "".join(self.iter_lines(level, is_last))
 
-        for i, child in enumerate(self.children):
-            ret += child.__repr__(level + 1, is_last=(i == len(self.children) - 1))
-        return ret
+    def iter_lines(self, level=0, is_last=True, max_depth=None, max_nodes=None):
+        """
+        Yields the tree drawing line by line, walking the tree with an explicit
+        stack so deeply nested programs print too. Nodes more than max_depth
+        levels below this one, and any after the first max_nodes, are left out
+        and marked with a '...' line.
+        """
+        stack = [(self, level, is_last)]
+        printed = 0
+        while stack:
+            node, depth, is_last = stack.pop()
+            indent = "    " * depth
+            if max_nodes is not None and printed >= max_nodes:
+                yield f"{indent}└── ...\n"
+                return
+            prefix = indent + ("└── " if is_last else "├── ")
+            value_str = str(node.value) if node.value is not None else ""
+            yield f"{prefix}{node.type}: {value_str}\n"
+            printed += 1
+
+            if not node.children:
+                continue
+            if max_depth is not None and depth - level >= max_depth:
+                yield f"{indent}    └── ...\n"
+                continue
+            last = len(node.children) - 1
+            for i in range(last, -1, -1):
+                stack.append((node.children[i], depth + 1, i == last))
+
+    def write(self, file, max_depth=None, max_nodes=None):
+        """Writes repr(self) to file a line at a time, with the limits of iter_lines."""
+        file.writelines(self.iter_lines(max_depth=max_depth, max_nodes=max_nodes))
 
 ###########################################
 #            ERROR HANDLER                #
@@ -58,37 +94,206 @@ class TypeError(ParserError):
 #            PARSER              #
 ##################################
 
+def kind_set(*types):
+    """A bitset of token kinds; a token is in it when kinds >> token.kind & 1."""
+    return sum(1 << TokenKind[type_] for type_ in types)
+
+
+SYNCHRONIZE_STOP_KINDS = kind_set('SEMICOLON', 'R_CURLY')
+STATEMENT_START_KINDS = kind_set('KEYWORD', 'DATA_TYPE', 'IDENTIFIER')
+NAME_KINDS = kind_set('IDENTIFIER', 'KEYWORD', 'RESERVED_WORD')
+UPDATE_OPERATOR_KINDS = kind_set('INCREMENT_UNARY_OP', 'DECREMENT_UNARY_OP')
+COMPOUND_ASSIGN_KINDS = kind_set('ADD_ASSIGN_OP', 'SUBT_ASSIGN_OP', 'MULTIPLY_ASSIGN_OP', 'DIV_ASSIGN_OP', 'MOD_ASSIGN_OP')
+
+# Binary operators from loosest to tightest. Each level lists (token type, lexeme)
+# pairs; the bare LOGICAL_OPERATOR and ARITHMETIC_OPERATOR kinds are kept for
+# token streams that use them instead of the specific kinds.
+OPERATOR_PRECEDENCE = (
+    ('left', (('OR_LOGICAL_OP', '||'), ('LOGICAL_OPERATOR', '||'))),
+    ('left', (('AND_LOGICAL_OP', '&&'), ('LOGICAL_OPERATOR', '&&'))),
+    ('left', (('BITWISE_OR_OP', '`'),)),
+    ('left', (('BITWISE_XOR_OP', '^'),)),
+    ('left', (('BITWISE_AND_OP', '&'),)),
+    ('left', (('EQUAL_TO', '=='), ('NOT_EQUAL_TO', '!='))),
+    ('left', (('LESS_THAN', '<'), ('GREATER_THAN', '>'),
+              ('LESS_THAN_OR_EQUAL_TO', '<='), ('GREATER_THAN_OR_EQUAL_TO', '>='))),
+    ('left', (('LEFT_SHIFT_OP', '<<'), ('RIGHT_SHIFT_OP', '>>'))),
+    ('left', (('ADD_OPERATOR', '+'), ('SUBTRACT_OPERATOR', '-'),
+              ('ARITHMETIC_OPERATOR', '+'), ('ARITHMETIC_OPERATOR', '-'))),
+    ('left', (('MULTIPLY_OP', '*'), ('DIVIDE_OP', '/'), ('MODULO_OP', '%'),
+              ('ARITHMETIC_OPERATOR', '*'), ('ARITHMETIC_OPERATOR', '/'), ('ARITHMETIC_OPERATOR', '%'))),
+    ('right', (('EXPONENTIATION_OP', '**'), ('ARITHMETIC_OPERATOR', '**'))),
+)
+
+
+def binding_powers(levels):
+    """Maps (token kind, lexeme) to the (left, right) binding powers Parser.expr uses."""
+    powers = {}
+    for level, (associativity, operators) in enumerate(levels, 1):
+        left = 2 * level
+        right = left + 1 if associativity == 'left' else left
+        for type_, lexeme in operators:
+            powers[(TokenKind[type_], lexeme)] = (left, right)
+    return powers
+
+
+INFIX_BINDING_POWERS = binding_powers(OPERATOR_PRECEDENCE)
+# Prefix operators bind tighter than '*' but looser than '**', so -a ** b is -(a ** b).
+PREFIX_BINDING_POWER = 2 * len(OPERATOR_PRECEDENCE) - 1
+PREFIX_OPERATORS = {
+    (TokenKind[type_], lexeme): node_type for type_, lexeme, node_type in (
+        ('ADD_OPERATOR', '+', "Unary Operator"), ('SUBTRACT_OPERATOR', '-', "Unary Operator"),
+        ('UNARY_OPERATOR', '+', "Unary Operator"), ('UNARY_OPERATOR', '-', "Unary Operator"),
+        # The lexer types a sign after '=', '(', ',' or ';' as ARITHMETIC_OPERATOR.
+        ('ARITHMETIC_OPERATOR', '+', "Unary Operator"), ('ARITHMETIC_OPERATOR', '-', "Unary Operator"),
+        ('INCREMENT_UNARY_OP', '++', "Unary Operator"), ('DECREMENT_UNARY_OP', '--', "Unary Operator"),
+        ('BITWISE_NOT_OP', '~', "Unary Operator"),
+        ('NOT_LOGICAL_OP', '!', "UnaryLogicalOp"), ('LOGICAL_OPERATOR', '!', "UnaryLogicalOp"),
+    )
+}
+
+# Parser methods that parse each production, keyed on (token type, lexeme) of
+# the token the production starts with; a None lexeme matches any token of
+# that type. Parser binds them once per instance, so picking a production is a
+# dict lookup instead of a walk down an if/elif chain.
+STATEMENT_PRODUCTIONS = {
+    ('DATA_TYPE', None): 'declaration',
+    ('KEYWORD', 'while'): 'parse_iterative_statement',
+    ('KEYWORD', 'for'): 'parse_iterative_statement',
+    ('KEYWORD', 'repeat'): 'parse_iterative_statement',
+    ('KEYWORD', 'if'): 'parse_conditional_statement',
+    ('KEYWORD', 'print'): 'output_statement',
+    ('KEYWORD', 'println'): 'output_statement',
+    ('KEYWORD', 'input'): 'input_statement',
+    ('IDENTIFIER', None): 'assignment_or_function_call',
+}
+FACTOR_PRODUCTIONS = {
+    ('INTEGER', None): 'literal',
+    ('FLOAT', None): 'literal',
+    ('STRING_LITERAL', None): 'literal',
+    ('CHAR_LITERAL', None): 'literal',
+    ('IDENTIFIER', None): 'name_factor',
+    ('KEYWORD', None): 'name_factor',
+    ('RESERVED_WORD', None): 'name_factor',
+    ('L_PARENTHESIS', None): 'parenthesized',
+}
+# StackParser's step generators for the compound statements.
+STATEMENT_STEPS = {
+    ('KEYWORD', 'while'): 'loop_steps',
+    ('KEYWORD', 'for'): 'loop_steps',
+    ('KEYWORD', 'repeat'): 'loop_steps',
+    ('KEYWORD', 'if'): 'conditional_steps',
+}
+# The node type parse_member_access gives a name that starts a member access.
+MEMBER_ROOT_TYPES = {
+    **dict.fromkeys(('cm', 'ft', 'in', 'kg', 'km', 'l', 'lbs', 'm', 'mg', 'mm', 'sq'), "UnitSpecifier"),
+    **dict.fromkeys(('areaOf', 'volumeOf', 'perimeterOf'), "Geometric"),
+    'input': "Function",
+}
+
+
+def productions(table):
+    """Keys a production table on token kinds instead of type names."""
+    return {(TokenKind[type_], lexeme): name for (type_, lexeme), name in table.items()}
+
+
+STATEMENT_PRODUCTION_KINDS = productions(STATEMENT_PRODUCTIONS)
+FACTOR_PRODUCTION_KINDS = productions(FACTOR_PRODUCTIONS)
+STATEMENT_STEP_KINDS = productions(STATEMENT_STEPS)
+
+# How much work the async entry points do between handing control back to the event loop.
+ASYNC_TOKENS_PER_YIELD = 2048
+ASYNC_STATEMENTS_PER_YIELD = 64
+
 class ReplacementFieldNode(ASTNode):
+    __slots__ = ()
+
     def __init__(self, identifier):
         super().__init__(type_="ReplacementField", value=identifier)
 
 class LiteralNode(ASTNode):
+    __slots__ = ()
+
     def __init__(self, value):
         super().__init__(type_="Literal", value=value)
 
 class OutputStatementNode(ASTNode):
+    __slots__ = ()
+
     def __init__(self, parts):
         super().__init__(type_="OutputStatement", children=parts)
-        self.parts = parts  # Redundant but kept for clarity
+
+    @property
+    def parts(self):
+        return self.children  # Kept for clarity; the same list as children
 
 class Parser:
     def __init__(self, tokens):
+        # tokens can be a list or any iterable, such as a lexer that is still
+        # running: they are pulled one at a time, and the tokens read ahead
+        # for peek() wait in lookahead.
         self.tokens = tokens
+        self.token_stream = iter(tokens)
+        self.lookahead = deque()
         self.current_token = None
         self.pos = -1
         self.had_error = False
         self.syntax_errors = []  # Initialize syntax_errors list
         self.previous_token = None  # Track previous token
+        self.span_starts = []  # First token of each open span
+        self.span_anchors = [0]  # Where the offset of the next span counts from, per open span and the program
+        self.reusable_blocks = None  # {token index: (Block node, length)} while reparsing
+        self.statement_productions = self.bind_productions(STATEMENT_PRODUCTION_KINDS)
+        self.factor_productions = self.bind_productions(FACTOR_PRODUCTION_KINDS)
         self.advance()
 
+    def bind_productions(self, table):
+        """Binds the method names of a production table to this parser, so subclass overrides are picked up."""
+        return {key: getattr(self, name) for key, name in table.items()}
+
+    def production(self, productions):
+        """The bound production for the current token, or None."""
+        token = self.current_token
+        return productions.get((token.kind, token.value)) or productions.get((token.kind, None))
+
     def advance(self):
         self.previous_token = self.current_token  # Track previous token
         self.pos += 1
-        if self.pos < len(self.tokens):
-            self.current_token = self.tokens[self.pos]
+        if self.lookahead:
+            self.current_token = self.lookahead.popleft()
         else:
-            self.current_token = None
+            self.current_token = next(self.token_stream, None)
+
+    def seek(self, pos):
+        """Moves to token pos of a token list, dropping any lookahead."""
+        tokens = self.tokens
+        self.lookahead.clear()
+        self.token_stream = map(tokens.__getitem__, range(pos, len(tokens)))
+        self.current_token = tokens[pos - 1] if pos else None
+        self.pos = pos - 1
+        self.advance()
 
+    def open_span(self):
+        self.span_starts.append(self.pos)
+        self.span_anchors.append(self.pos)
+
+    def close_span(self, node):
+        """Sets node.span to the tokens read since the matching open_span()."""
+        start = self.span_starts.pop()
+        self.span_anchors.pop()
+        node.span = (start - self.span_anchors[-1], self.pos - start)
+        self.span_anchors[-1] = self.pos
+        return node
+
+    def reuse_block(self):
+        """Returns the old Block that starts at the current token while reparsing, skipping its tokens, or None."""
+        entry = self.reusable_blocks.pop(self.pos, None) if self.reusable_blocks else None
+        if entry is None:
+            return None
+        node, length = entry
+        self.open_span()
+        self.seek(self.pos + length)
+        return self.close_span(node)
                 
     def parse(self):
         self.had_error = False
@@ -102,10 +307,16 @@ class Parser:
         
 
     def program(self):
-        statements = []
+        return ASTNode(type_="Program", children=list(self.iter_statements()))
 
-        if self.current_token and self.current_token.type == 'SEMICOLON':
-            if self.peek() and self.peek().type == 'SEMICOLON':
+    def iter_statements(self, stop_at=()):
+        """
+        Yields the program's statements as they are parsed, recording and
+        skipping past syntax errors. Stops early once the next statement
+        would start at a token index in stop_at.
+        """
+        if self.current_token and self.current_token.kind == TokenKind.SEMICOLON:
+            if self.peek() and self.peek().kind == TokenKind.SEMICOLON:
                 self.syntax_errors.append({
                     "Error Type": "Extra Semicolon",
                     "Details": "Unexpected ';' after expression",
@@ -114,10 +325,15 @@ class Parser:
                 self.advance()  # Skip extra semicolon
 
 
-        while self.current_token is not None and self.current_token.type != 'EOF':
+        while self.current_token is not None and self.current_token.kind != TokenKind.EOF:
+            start = self.pos
+            if start in stop_at:
+                return
             try:
-                statements.append(self.statement())
+                self.open_span()
+                statement = self.close_span(self.statement())
             except ParserError as e:
+                del self.span_starts[:], self.span_anchors[1:]
                 self.syntax_errors.append({
                     "Error Type": e.error_name,
                     "Details": e.details,
@@ -125,42 +341,33 @@ class Parser:
                 })
                 print(f"Syntax Error Detected: {e.error_name} - {e.details} @ {e.get_location()}")  # Debugging
                 self.synchronize()
-
-        return ASTNode(type_="Program", children=statements)
+                if self.pos == start:
+                    self.advance()  # A statement starter statement() rejects (e.g. a stray 'else') would stop here forever
+                continue
+            yield statement
     
     def synchronize(self):
         # Skip tokens until a statement boundary is found (e.g., ';', '}', or keywords)
         while self.current_token is not None:
-            if self.current_token.type in ('SEMICOLON', 'R_CURLY'):
+            if SYNCHRONIZE_STOP_KINDS >> self.current_token.kind & 1:
                 self.advance()
                 break
             # Check if the next token is a statement starter (e.g., 'if', 'while', etc.)
-            if self.current_token.type in ('KEYWORD', 'DATA_TYPE', 'IDENTIFIER'):
+            if STATEMENT_START_KINDS >> self.current_token.kind & 1:
                 break
             self.advance()
 
     def statement(self):
-        if self.current_token.type == 'DATA_TYPE':
-            return self.declaration()
-        elif self.current_token.type == 'KEYWORD':
-            keyword = self.current_token.value
-            if keyword in ('while', 'for', 'repeat'):
-                return self.parse_iterative_statement()
-            elif keyword == 'if':
-                return self.parse_conditional_statement()
-            elif keyword in ('print', 'println'):
-                return self.output_statement()
-            elif keyword == 'input':
-                return self.input_statement()
-            else:
-                raise UnexpectedTokenError(
-                    self.current_token.pos_start,
-                    self.current_token.pos_end,
-                    f"Unexpected keyword: {keyword}"
-                )
-        elif self.current_token.type == 'IDENTIFIER':
-            return self.assignment_or_function_call()
-        elif self.current_token.type == 'SEMICOLON':  # Handle extra semicolons
+        production = self.production(self.statement_productions)
+        if production is not None:
+            return production()
+        if self.current_token.kind == TokenKind.KEYWORD:
+            raise UnexpectedTokenError(
+                self.current_token.pos_start,
+                self.current_token.pos_end,
+                f"Unexpected keyword: {self.current_token.value}"
+            )
+        elif self.current_token.kind == TokenKind.SEMICOLON:  # Handle extra semicolons
             raise UnexpectedTokenError(
                 self.current_token.pos_start,
                 self.current_token.pos_end,
@@ -183,17 +390,17 @@ class Parser:
 
         while True:
             # Expect a variable name (identifier)
-            identifier_token = self.expect('IDENTIFIER', "Expected variable name")
+            identifier_token = self.expect(TokenKind.IDENTIFIER, "Expected variable name")
             identifier_value = identifier_token.value
     
             # NEW: Check for a unit specifier immediately after the identifier.
             unit = None
-            if self.current_token and self.current_token.type == 'L_PARENTHESIS':
+            if self.current_token and self.current_token.kind == TokenKind.L_PARENTHESIS:
                 unit = self.parse_unit_specifier()
 
             #error handler
             initializer = None
-            if self.current_token and self.current_token.type == 'ASSIGN_OP':
+            if self.current_token and self.current_token.kind == TokenKind.ASSIGN_OP:
                 self.advance()
                 initializer = self.expr()
 
@@ -214,13 +421,13 @@ class Parser:
                                 f"Cannot assign {initializer.value} of type '{initializer.value.__class__.__name__}' to '{data_type}'"
                             )
                 
-            # Create a Declarator node.
-            declarator_node = ASTNode(type_="Declarator", value=identifier_value)
-            if unit:
-                # Add a UnitSpecifier as the first child.
-                declarator_node.children.append(ASTNode(type_="UnitSpecifier", value=unit))
+            # Create a Declarator node, with a UnitSpecifier as its first child if there is one.
+            declarator_children = [ASTNode(type_="UnitSpecifier", value=unit)] if unit else None
+            declarator_node = ASTNode(type_="Declarator", value=identifier_value, children=declarator_children)
             if initializer:
-                if data_type == 'int' and isinstance(initializer.value, str):
+                # Only literals are checked here: operators and names carry a
+                # string value (and no position) without being strings.
+                if initializer.type == "Literal" and data_type == 'int' and isinstance(initializer.value, str):
                     self.syntax_errors.append({
                         "Error Type": "Invalid Assignment",
                         "Details": f"'{initializer.value}' is not a valid int literal",
@@ -228,14 +435,14 @@ class Parser:
                     })
             declarators.append(declarator_node)
 
-            if self.current_token and self.current_token.type == 'SEPARATING_SYMBOL':
+            if self.current_token and self.current_token.kind == TokenKind.SEPARATING_SYMBOL:
                 self.advance()
             else:
                 break
 
         #error hadnler
         if expect_semicolon:
-            self.expect('SEMICOLON', "Expected ';' after declaration")
+            self.expect(TokenKind.SEMICOLON, "Expected ';' after declaration")
         return ASTNode(
             type_="VariableDeclaration",
             value=data_type,
@@ -263,19 +470,19 @@ class Parser:
             unit = unit_token_value[:-1]
             self.advance()  # Consume the token with the trailing ")"
             # If the very next token is an extra R_PARENTHESIS, consume it.
-            if self.current_token and self.current_token.type == 'R_PARENTHESIS':
+            if self.current_token and self.current_token.kind == TokenKind.R_PARENTHESIS:
                 self.advance()
         else:
             # Otherwise, take the token as the unit.
             unit = unit_token_value
             self.advance()  # Consume the unit token.
             # Now expect an explicit right parenthesis.
-            self.expect('R_PARENTHESIS', "Expected ')' after unit specifier")
+            self.expect(TokenKind.R_PARENTHESIS, "Expected ')' after unit specifier")
         return unit
     
     def output_statement(self):
         # Check for 'println' or 'print' keyword
-        if not (self.current_token and self.current_token.type == 'KEYWORD' and self.current_token.value in ('println', 'print')):
+        if not (self.current_token and self.current_token.kind == TokenKind.KEYWORD and self.current_token.value in ('println', 'print')):
             raise UnexpectedTokenError(
                 self.current_token.pos_start if self.current_token else None,
                 self.current_token.pos_end if self.current_token else None,
@@ -284,12 +491,12 @@ class Parser:
         keyword = self.current_token.value
         self.advance()  # Consume the keyword
 
-        self.expect('L_PARENTHESIS', "Expected '(' after output keyword")
+        self.expect(TokenKind.L_PARENTHESIS, "Expected '(' after output keyword")
 
         parts = []  # This will hold the literal and replacement nodes
 
         # Expect a string literal first
-        if self.current_token.type != 'STRING_LITERAL':
+        if self.current_token.kind != TokenKind.STRING_LITERAL:
             raise UnexpectedTokenError(
                 self.current_token.pos_start,
                 self.current_token.pos_end,
@@ -302,9 +509,9 @@ class Parser:
         self.advance()  # Consume the STRING_LITERAL
 
         # Now check for any replacement field tokens that might follow.
-        while self.current_token and self.current_token.type == 'L_REPFIELD':
+        while self.current_token and self.current_token.kind == TokenKind.L_REPFIELD:
             self.advance()  # Consume the '{'
-            if self.current_token.type != 'IDENTIFIER':
+            if self.current_token.kind != TokenKind.IDENTIFIER:
                 raise UnexpectedTokenError(
                     self.current_token.pos_start,
                     self.current_token.pos_end,
@@ -313,17 +520,17 @@ class Parser:
             identifier_value = self.current_token.value
             self.advance()  # Consume the identifier
 
-            self.expect('R_REPFIELD', "Expected '}' after replacement field")
+            self.expect(TokenKind.R_REPFIELD, "Expected '}' after replacement field")
 
             # Create a replacement field node
             parts.append(ReplacementFieldNode(identifier_value))
 
             # Allow string literals after a replacement field
-            if self.current_token and self.current_token.type == 'STRING_LITERAL':
+            if self.current_token and self.current_token.kind == TokenKind.STRING_LITERAL:
                 parts.append(LiteralNode(self.current_token.value))
                 self.advance()
 
-        if self.current_token.type != 'R_PARENTHESIS':
+        if self.current_token.kind != TokenKind.R_PARENTHESIS:
             raise UnexpectedTokenError(
                 self.previous_token.pos_start,
                 self.previous_token.pos_end,
@@ -334,7 +541,7 @@ class Parser:
         else:
             self.advance()  # Consume closing parenthesis
 
-        self.expect('SEMICOLON', "Expected ';' after output statement")
+        self.expect(TokenKind.SEMICOLON, "Expected ';' after output statement")
 
         return OutputStatementNode(parts)
 
@@ -362,9 +569,9 @@ class Parser:
         
     def input_statement(self):
         self.advance()
-        self.expect('L_PARENTHESIS', "Expected '('")
-        self.expect('R_PARENTHESIS', "Expected ')'")
-        self.expect('SEMICOLON', "Expected ';' after input statement")
+        self.expect(TokenKind.L_PARENTHESIS, "Expected '('")
+        self.expect(TokenKind.R_PARENTHESIS, "Expected ')'")
+        self.expect(TokenKind.SEMICOLON, "Expected ';' after input statement")
         return ASTNode(type_="InputStatement")
 
     def parse_iterative_statement(self):
@@ -385,34 +592,42 @@ class Parser:
             )
 
     def parse_while_loop(self):
-        self.expect('L_PARENTHESIS', "Expected '(' after 'while'")
-        condition = self.expr()
-        self.expect('R_PARENTHESIS', "Expected ')' after condition")
+        condition = self.parse_while_header()
         body = self.block()
         return ASTNode(type_="WhileLoop", children=[condition, body])
 
+    def parse_while_header(self):
+        self.expect(TokenKind.L_PARENTHESIS, "Expected '(' after 'while'")
+        condition = self.expr()
+        self.expect(TokenKind.R_PARENTHESIS, "Expected ')' after condition")
+        return condition
+
     def parse_for_loop(self):
-        self.expect('L_PARENTHESIS', "Expected '(' after 'for'")
+        initializer, condition, update = self.parse_for_header()
+        body = self.block()
+        return ASTNode(type_="ForLoop", children=[initializer, condition, update, body])
+
+    def parse_for_header(self):
+        self.expect(TokenKind.L_PARENTHESIS, "Expected '(' after 'for'")
         # Parse initializer without expecting semicolon in declaration
-        if self.current_token.type == 'DATA_TYPE':
+        if self.current_token.kind == TokenKind.DATA_TYPE:
             initializer = self.declaration(expect_semicolon=False)  # Pass False here
         else:
             initializer = self.assignment_or_function_call()
-        self.expect('SEMICOLON', "Expected ';' after initializer")  # Now expects correctly
+        self.expect(TokenKind.SEMICOLON, "Expected ';' after initializer")  # Now expects correctly
         condition = self.expr()
-        self.expect('SEMICOLON', "Expected ';' after condition")
+        self.expect(TokenKind.SEMICOLON, "Expected ';' after condition")
         update = self.parse_update_expression()
-        self.expect('R_PARENTHESIS', "Expected ')' after for clauses")
-        body = self.block()
-        return ASTNode(type_="ForLoop", children=[initializer, condition, update, body])
+        self.expect(TokenKind.R_PARENTHESIS, "Expected ')' after for clauses")
+        return initializer, condition, update
 
     def parse_update_expression(self):
-        identifier = self.expect('IDENTIFIER', "Expected identifier in update expression").value
-        if self.current_token.type in ('INCREMENT_UNARY_OP', 'DECREMENT_UNARY_OP'):
+        identifier = self.expect(TokenKind.IDENTIFIER, "Expected identifier in update expression").value
+        if UPDATE_OPERATOR_KINDS >> self.current_token.kind & 1:
             op = self.current_token.value
             self.advance()
             return ASTNode(type_="Update", value=op, children=[ASTNode(type_="Identifier", value=identifier)])
-        elif self.current_token.type in ('ADD_ASSIGN_OP', 'SUBT_ASSIGN_OP', 'MULTIPLY_ASSIGN_OP', 'DIV_ASSIGN_OP', 'MOD_ASSIGN_OP'):
+        elif COMPOUND_ASSIGN_KINDS >> self.current_token.kind & 1:
             op = self.current_token.value
             self.advance()
             value = self.expr()
@@ -428,8 +643,13 @@ class Parser:
             )
 
     def parse_repeat_loop(self):
+        times = self.parse_repeat_header()
+        body = self.block()
+        return ASTNode(type_="RepeatLoop", children=[times, body])
+
+    def parse_repeat_header(self):
         times = self.expr()
-        if self.current_token and self.current_token.type == 'KEYWORD' and self.current_token.value == 'times':
+        if self.current_token and self.current_token.kind == TokenKind.KEYWORD and self.current_token.value == 'times':
             self.advance()
         else:
             raise UnexpectedTokenError(
@@ -437,21 +657,24 @@ class Parser:
                 self.current_token.pos_end if self.current_token else None,
                 "Expected 'times' after repeat count"
             )
-        body = self.block()
-        return ASTNode(type_="RepeatLoop", children=[times, body])
+        return times
 
     def block(self):
-        self.expect('L_CURLY', "Expected '{' to start block")
+        reused = self.reuse_block()
+        if reused is not None:
+            return reused
+        self.open_span()
+        self.expect(TokenKind.L_CURLY, "Expected '{' to start block")
         statements = []
-        while self.current_token.type != 'R_CURLY':
+        while self.current_token.kind != TokenKind.R_CURLY:
             statements.append(self.statement())
-            if self.current_token and self.current_token.type == 'SEMICOLON':
+            if self.current_token and self.current_token.kind == TokenKind.SEMICOLON:
                 self.advance()
-        self.expect('R_CURLY', "Expected '}' to end block")
-        return ASTNode(type_="Block", children=statements)
+        self.expect(TokenKind.R_CURLY, "Expected '}' to end block")
+        return self.close_span(ASTNode(type_="Block", children=statements))
 
-    def expect(self, token_type, error_message):
-        if self.current_token and self.current_token.type == token_type:
+    def expect(self, token_kind, error_message):
+        if self.current_token and self.current_token.kind == token_kind:
             token = self.current_token
             self.advance()
             return token
@@ -462,15 +685,12 @@ class Parser:
         )
 
     def parse_conditional_statement(self):
-        self.advance()
-        self.expect('L_PARENTHESIS', "Expected '(' after 'if'")
-        condition = self.parse_condition()
-        self.expect('R_PARENTHESIS', "Expected ')' after condition")
+        condition = self.parse_if_header()
         true_block = self.parse_statement_block()
         false_block = None
 
         # Check for 'else' clause
-        if self.current_token and self.current_token.type == 'KEYWORD' and self.current_token.value == 'else':
+        if self.current_token and self.current_token.kind == TokenKind.KEYWORD and self.current_token.value == 'else':
             self.advance()
             if self.current_token and self.current_token.value == 'if':
                 false_block = self.parse_conditional_statement()
@@ -485,41 +705,39 @@ class Parser:
         return ASTNode(type_="ConditionalStatement", children=children)
     
     
+    def parse_if_header(self):
+        self.advance()
+        self.expect(TokenKind.L_PARENTHESIS, "Expected '(' after 'if'")
+        condition = self.parse_condition()
+        self.expect(TokenKind.R_PARENTHESIS, "Expected ')' after condition")
+        return condition
+
     def parse_statement_block(self):
-        if self.current_token.type == 'L_CURLY':
+        if self.current_token.kind == TokenKind.L_CURLY:
             return self.block()
         else:
             stmt = self.statement()
             return ASTNode(type_="Block", children=[stmt])
 
     def parse_condition(self):
-        return self.logical_expr()
-
-    def logical_expr(self):
-        left = self.expr()
-        while self.current_token and self.current_token.type == 'LOGICAL_OPERATOR':
-            op = self.current_token
-            self.advance()
-            right = self.expr()
-            left = ASTNode(type_="LogicalOp", value=op.value, children=[left, right])
-        return left
+        return self.expr()
 
     def assignment_or_function_call(self):
         # Parse the left-hand side (must be an identifier or member access)
         identifier = self.parse_member_access()
 
         # Check if this is a function call (e.g., areaOf.Rectangle(...))
-        if self.current_token and self.current_token.type == 'L_PARENTHESIS':
+        if self.current_token and self.current_token.kind == TokenKind.L_PARENTHESIS:
             return self.parse_function_call(identifier)
 
         # Handle assignment (e.g., x = 5)
-        if self.current_token and self.current_token.type == 'ASSIGN_OP':
+        if self.current_token and self.current_token.kind == TokenKind.ASSIGN_OP:
             self.advance()  # Consume '='
             value = self.expr()
-            self.expect('SEMICOLON', "Expected ';' after assignment")
+            self.expect(TokenKind.SEMICOLON, "Expected ';' after assignment")
             return ASTNode(type_="Assignment", value=identifier.value, children=[value])
         
-        if self.current_token is None or self.current_token.type != 'SEMICOLON':
+        if self.current_token is None or self.current_token.kind != TokenKind.SEMICOLON:
             raise UnexpectedTokenError(
                 self.previous_token.pos_start,
                 self.previous_token.pos_end,
@@ -527,15 +745,12 @@ class Parser:
             )
 
         # If not an assignment or function call, treat as an identifier expression
-        self.expect('SEMICOLON', "Expected ';' after expression")
+        self.expect(TokenKind.SEMICOLON, "Expected ';' after expression")
         return identifier
 
     def parse_member_access(self):
-        unit_specifiers = ('cm', 'ft', 'in', 'kg', 'km', 'l', 'lbs', 'm', 'mg', 'mm', 'sq')
-        geometric_words = ('areaOf', 'volumeOf', 'perimeterOf')
-
         # Accept tokens if type is IDENTIFIER, KEYWORD, or RESERVED_WORD.
-        if self.current_token.type in ('IDENTIFIER', 'KEYWORD', 'RESERVED_WORD'):
+        if NAME_KINDS >> self.current_token.kind & 1:
             token = self.current_token
             self.advance()
         else:
@@ -546,17 +761,10 @@ class Parser:
             )
         
         # dito ung line na inaayos ko
-        if token.value in unit_specifiers:
-            current_node = ASTNode(type_="UnitSpecifier", value=token.value)
-        elif token.value in geometric_words:
-            current_node = ASTNode(type_="Geometric", value=token.value)
-        elif token.value == 'input':
-            current_node = ASTNode(type_="Function", value=token.value)
-        else:
-            current_node = ASTNode(type_="Identifier", value=token.value)
-        while self.current_token and self.current_token.type == 'ACCESSOR_SYMBOL':
+        current_node = ASTNode(type_=MEMBER_ROOT_TYPES.get(token.value, "Identifier"), value=token.value)
+        while self.current_token and self.current_token.kind == TokenKind.ACCESSOR_SYMBOL:
             self.advance()  # Consume the '.' token
-            if self.current_token.type not in ('IDENTIFIER', 'KEYWORD', 'RESERVED_WORD'):
+            if not NAME_KINDS >> self.current_token.kind & 1:
                 raise UnexpectedTokenError(
                     self.current_token.pos_start if self.current_token else None,
                     self.current_token.pos_end if self.current_token else None,
@@ -572,17 +780,19 @@ class Parser:
         return current_node
 
     def parse_function_call(self, identifier_node):
-        self.expect('L_PARENTHESIS', "Expected '(' after function name")
+        self.expect(TokenKind.L_PARENTHESIS, "Expected '(' after function name")
         
         arguments = []
-        if self.current_token.type != 'R_PARENTHESIS':
+        if self.current_token.kind != TokenKind.R_PARENTHESIS:
             while True:
                 arguments.append(self.expr())
-                if self.current_token.type != 'SEPARATING_SYMBOL':
+                if self.current_token.kind != TokenKind.SEPARATING_SYMBOL:
                     break
                 self.advance()
+        return self.finish_function_call(identifier_node, arguments)
 
-        self.expect('R_PARENTHESIS', "Expected ')' after function arguments")
+    def finish_function_call(self, identifier_node, arguments):
+        self.expect(TokenKind.R_PARENTHESIS, "Expected ')' after function arguments")
 
         valid_functions = ['println', 'print', 'input']
         if identifier_node.value not in valid_functions:
@@ -602,287 +812,91 @@ class Parser:
         )
 
 
-    def expr(self):
+    def expr(self, min_binding_power=0):
         """
         Parses expressions, including function calls and assignments.
+        Operands come from factor(); operators are grouped by a Pratt loop
+        over INFIX_BINDING_POWERS, so every precedence level shares one call.
         - Example: ARectangle = areaOf.rectangle(L, W);
-        - Example: x = myFunction(5, y + 2);
+        - Example: x = myFunction(5, y + 2 * z);
         """
-        relational_ops = [
-            'LESS_THAN', 'GREATER_THAN', 'LESS_THAN_OR_EQUAL_TO',
-            'GREATER_THAN_OR_EQUAL_TO', 'EQUAL_TO', 'NOT_EQUAL_TO'
-        ]
-
-        # ✅ Parse left-hand side (could be a function call or identifier)
-        left = self.term()
-
-        # ✅ Check if it's a function call (Fix: Now `expr()` can handle function calls!)
-        if self.current_token and self.current_token.type == 'L_PARENTHESIS':
-            left = self.parse_function_call(left)  # Now correctly recognizes function calls!
-
-        # ✅ Handle binary operators (e.g., x + y, a == b)
-        while self.current_token and (
-            self.current_token.type in ['ARITHMETIC_OPERATOR'] + relational_ops or
-            (self.current_token.type == 'LOGICAL_OPERATOR' and self.current_token.value in ['&&', '||'])
-        ):
-            op = self.current_token
+        token = self.current_token
+        prefix = PREFIX_OPERATORS.get((token.kind, token.value)) if token else None
+        if prefix:
             self.advance()
-            right = self.term()
-
-            # ✅ Ensure right-hand side is parsed correctly
-            if self.current_token and self.current_token.type == 'L_PARENTHESIS':
-                right = self.parse_function_call(right)
-
-            left = ASTNode(type_="BinaryOp", value=op.value, children=[left, right])
+            operand = self.expr(PREFIX_BINDING_POWER)
+            left = ASTNode(type_=prefix, value=token.value, children=[operand])
+        else:
+            left = self.factor()
 
-        return left
-    
-    def term(self):
-        left = self.factor()
-        while self.current_token and (
-            self.current_token.type == 'ARITHMETIC_OPERATOR' and 
-            self.current_token.value in ('*', '/', '%')  # Ensure '%' is included
-        ):
-            op = self.current_token
+        while self.current_token:
+            token = self.current_token
+            # A '(' right after an operand calls it (e.g. areaOf.rectangle(L, W)).
+            if token.kind == TokenKind.L_PARENTHESIS:
+                left = self.parse_function_call(left)
+                continue
+            powers = INFIX_BINDING_POWERS.get((token.kind, token.value))
+            if powers is None or powers[0] < min_binding_power:
+                break
             self.advance()
-            right = self.factor()
-            left = ASTNode(type_="BinaryOp", value=op.value, children=[left, right])
-        return left
-
-    def parse_geometric_calculation(self, calculation_type):
-        self.expect('ACCESSOR_SYMBOL', f"Expected '.' after '{calculation_type}'")
-        
-        # Parse shape (e.g., Rectangle)
-        if self.current_token.type not in ('IDENTIFIER', 'RESERVED_WORD'):
-            raise UnexpectedTokenError(
-                self.current_token.pos_start,
-                self.current_token.pos_end,
-                f"Expected shape after '{calculation_type}.'"
-            )
-        shape = self.current_token.value
-        self.advance()
+            right = self.expr(powers[1])
+            left = ASTNode(type_="BinaryOp", value=token.value, children=[left, right])
 
-        # Parse parameters (e.g., L, W)
-        self.expect('L_PARENTHESIS', "Expected '('")
-        params = []
-        while self.current_token.type != 'R_PARENTHESIS':
-            params.append(self.expr())
-            if self.current_token.type == 'SEPARATING_SYMBOL':
-                self.advance()
-        self.expect('R_PARENTHESIS', "Expected ')'")
-        
-        return ASTNode(type_="GeometricCalculation", value=f"{calculation_type}.{shape}", children=params)
-    
-    def parse_shape_expression(self, shape_type):
-        # Expect parentheses and parameters
-        self.expect('L_PARENTHESIS', f"Expected '(' after '{shape_type}'")
-        
-        # Parse parameters
-        parameters = []
-        while self.current_token.type != 'R_PARENTHESIS':
-            parameters.append(self.expr())
-            if self.current_token.type == 'SEPARATING_SYMBOL':
-                self.advance()
-        
-        self.expect('R_PARENTHESIS', "Expected ')' after parameters")
-        
-        # Return an AST node for the shape
-        return ASTNode(
-            type_="Shape",
-            value=shape_type,
-            children=parameters
-        )
-    
-
-    def parse_measurement_expression(self, measurement_type):
-        # NEW: Check if the next token is an L_PARENTHESIS. If not, treat it as a simple identifier.
-        if self.current_token and self.current_token.type != 'L_PARENTHESIS':
-            # Not followed by '('; return as an Identifier node.
-            return ASTNode(type_="Identifier", value=measurement_type)
-        # Otherwise, parse it as a measurement expression.
-        self.expect('L_PARENTHESIS', f"Expected '(' after '{measurement_type}'")
-        parameters = []
-        while self.current_token.type != 'R_PARENTHESIS':
-            parameters.append(self.expr())
-            if self.current_token.type == 'SEPARATING_SYMBOL':
-                self.advance()
-        self.expect('R_PARENTHESIS', "Expected ')' after parameters")
-        return ASTNode(type_="Measurement", value=measurement_type, children=parameters)
-    
-    
-    def parse_unit_expression(self, unit_type):
-        # Expect a value to apply the unit to
-        value = self.expr()
-        
-        # Return an AST node for the unit
-        return ASTNode(
-            type_="Unit",
-            value=unit_type,
-            children=[value]
-        )
-    
-    def parse_fetch_expression(self):
-        # Expect parentheses and parameters
-        self.expect('L_PARENTHESIS', "Expected '(' after 'fetch'")
-        
-        # Parse parameters
-        parameters = []
-        while self.current_token.type != 'R_PARENTHESIS':
-            parameters.append(self.expr())
-            if self.current_token.type == 'SEPARATING_SYMBOL':
-                self.advance()
-        
-        self.expect('R_PARENTHESIS', "Expected ')' after parameters")
-        
-        # Return an AST node for the fetch operation
-        return ASTNode(
-            type_="FetchOperation",
-            children=parameters
-        )
+        return left
 
-    def parse_setprecision_expression(self):
-        # Expect parentheses and precision value
-        self.expect('L_PARENTHESIS', "Expected '(' after 'setprecision'")
-        precision = self.expr()
-        self.expect('R_PARENTHESIS', "Expected ')' after precision value")
-        
-        # Return an AST node for the setprecision operation
-        return ASTNode(
-            type_="SetPrecision",
-            children=[precision]
+    def factor(self):
+        token = self.current_token
+        production = self.production(self.factor_productions) if token else None
+        if production is not None:
+            return production()
+        raise UnexpectedTokenError(
+            pos_start=token.pos_start if token else None,
+            pos_end=token.pos_end if token else None,
+            details=f"Unexpected token: {token.type}" if token else "Unexpected end of input."
         )
 
-    def parse_cubic_expression(self):
-        # Expect parentheses and parameters
-        self.expect('L_PARENTHESIS', "Expected '(' after 'cubic'")
-        
-        # Parse parameters
-        parameters = []
-        while self.current_token.type != 'R_PARENTHESIS':
-            parameters.append(self.expr())
-            if self.current_token.type == 'SEPARATING_SYMBOL':
-                self.advance()
-        
-        self.expect('R_PARENTHESIS', "Expected ')' after parameters")
-        
-        # Return an AST node for the cubic operation
+    def literal(self):
+        token = self.current_token
+        self.advance()
         return ASTNode(
-            type_="CubicOperation",
-            children=parameters
+            type_="Literal",
+            value=token.value,
+            pos_start=token.pos_start,
+            pos_end=token.pos_end
         )
 
-    def factor(self):   
-        token = self.current_token
-
-        #error handler
-        if token.type in ('INTEGER', 'FLOAT', 'STRING_LITERAL', 'CHAR_LITERAL'):
-            # Capture position before advancing
-            pos_start = token.pos_start
-            pos_end = token.pos_end
-            self.advance()
-            return ASTNode(
-                type_="Literal",
-                value=token.value,
-                pos_start=pos_start,
-                pos_end=pos_end
-            )
-
+    def name_factor(self):
         # Handle built-in or function call: if an identifier is immediately followed by '('
-        if token.type in ('IDENTIFIER', 'KEYWORD', 'RESERVED_WORD'):
-            nxt = self.peek()
-            if nxt and nxt.type == 'L_PARENTHESIS':
-                # Create a node for the function name and parse the function call.
-                func_node = ASTNode(type_="Identifier", value=token.value)
-                self.advance()  # consume the function name token
-                return self.parse_function_call(func_node)
-            else:
-                return self.parse_member_access()
-    
-        # Handle reserved words
-        if self.current_token and self.current_token.type == 'RESERVED_WORD':
-            reserved_word = self.current_token.value
-            
-            # Geometric calculations
-            if reserved_word in ('areaOf', 'perimeterOf', 'volumeOf'):
-                self.advance()  # Consume the reserved word
-                return self.parse_geometric_calculation(reserved_word)
-            
-            # Shapes
-            elif reserved_word in ('circle', 'rectangle', 'square', 'triangle', 'sphere'):
-                self.advance()  # Consume the reserved word
-                return self.parse_shape_expression(reserved_word)
-            
-            # Measurements
-            elif reserved_word in ('radius', 'height', 'width', 'length', 'side', 'distance', 'circumference'):
-                self.advance()  # Consume the reserved word
-                return self.parse_measurement_expression(reserved_word)
-            
-            # Units
-            elif reserved_word in ('cm', 'ft', 'in', 'kg', 'km', 'l', 'lbs', 'm', 'mg', 'mm', 'sq'):
-                self.advance()  # Consume the reserved word
-                return self.parse_unit_expression(reserved_word)
-            
-            # Other operations
-            elif reserved_word == 'fetch':
-                self.advance()  # Consume the reserved word
-                return self.parse_fetch_expression()
-            elif reserved_word == 'setprecision':
-                self.advance()  # Consume the reserved word
-                return self.parse_setprecision_expression()
-            elif reserved_word == 'cubic':
-                self.advance()  # Consume the reserved word
-                return self.parse_cubic_expression()
-            
-            else:
-                raise UnexpectedTokenError(
-                    self.current_token.pos_start,
-                    self.current_token.pos_end,
-                    f"Unsupported reserved word: {reserved_word}"
-                )
-        
-        if self.current_token and self.current_token.type == 'LOGICAL_OPERATOR' and self.current_token.value == '!':
-            op = self.current_token
-            self.advance()
-            node = self.factor()
-            return ASTNode(type_="UnaryLogicalOp", value=op.value, children=[node])
-
+        nxt = self.peek()
+        if nxt and nxt.kind == TokenKind.L_PARENTHESIS:
+            # Create a node for the function name and parse the function call.
+            func_node = ASTNode(type_="Identifier", value=self.current_token.value)
+            self.advance()  # consume the function name token
+            return self.parse_function_call(func_node)
+        return self.parse_member_access()
+
+    def parenthesized(self):
         token = self.current_token
+        self.advance()  # Consume '('
+        return self.close_parenthesized(token, self.expr())
 
-        if token.type in ('ADD_OPERATOR', 'SUBTRACT_OPERATOR', 'UNARY_OPERATOR'):
-            op = token
-            self.advance()
-            factor_node = self.factor()
-            return ASTNode(type_="Unary Operator", value=op.value, children=[factor_node])
-
-        if token.type in ('INTEGER', 'FLOAT', 'STRING_LITERAL', 'CHAR_LITERAL'):
-            self.advance()
-            return ASTNode(type_="Literal", value=token.value)
-
-        if token.type == 'L_PARENTHESIS':
-            self.advance()  # Consume '('
-            node = self.expr()
-            if not self.current_token or self.current_token.type != 'R_PARENTHESIS':
-                raise UnexpectedTokenError(
-                    pos_start=token.pos_start,
-                    pos_end=self.current_token.pos_end if self.current_token else token.pos_start,
-                    details="Expected closing parenthesis."
-                )
-            self.advance()  # Consume ')'
-            return ASTNode(type_="Parenthesized Expression", children=[node])
-
-        if token.type in ('IDENTIFIER', 'KEYWORD', 'RESERVED_WORD'):
-            return self.parse_member_access()
-
-        raise UnexpectedTokenError(
-            pos_start=token.pos_start if token else None,
-            pos_end=token.pos_end if token else None,
-            details=f"Unexpected token: {token.type}" if token else "Unexpected end of input."
-        )
+    def close_parenthesized(self, open_token, node):
+        if not self.current_token or self.current_token.kind != TokenKind.R_PARENTHESIS:
+            raise UnexpectedTokenError(
+                pos_start=open_token.pos_start,
+                pos_end=self.current_token.pos_end if self.current_token else open_token.pos_start,
+                details="Expected closing parenthesis."
+            )
+        self.advance()  # Consume ')'
+        return ASTNode(type_="Parenthesized Expression", children=[node])
 
     def peek(self):
-        if self.pos + 1 < len(self.tokens):
-            return self.tokens[self.pos + 1]
-        return None
+        if not self.lookahead:
+            token = next(self.token_stream, None)
+            if token is None:
+                return None
+            self.lookahead.append(token)
+        return self.lookahead[0]
     
     def consume(self, expected_type, expected_value=None):
         """
@@ -906,6 +920,402 @@ class Parser:
         """Advances to the next token."""
         self.current_token = self.tokenizer.get_next_token()
 
+    async def parse_async(self, statements_per_yield=ASYNC_STATEMENTS_PER_YIELD):
+        """
+        parse() for asyncio code: the event loop gets control back after
+        every statements_per_yield statements, and cancelling the awaiting
+        task stops parsing there.
+        """
+        self.had_error = False
+        statements = []
+        for statement in self.iter_statements():
+            statements.append(statement)
+            if len(statements) % statements_per_yield == 0:
+                await asyncio.sleep(0)
+        return ASTNode(type_="Program", children=statements) if statements else None
+
+##################################
+#          STACK PARSER          #
+##################################
+
+class StackParser(Parser):
+    """
+    A Parser that keeps nesting on an explicit stack instead of the Python
+    call stack, so blocks, conditionals and expressions can nest to any depth.
+    Compound statements are written as step generators: a step yields the
+    steps for a nested statement or block and is sent back its node. An
+    else-if chain becomes one ConditionalStatement whose children are an
+    IfClause per branch, followed by the else Block if there is one.
+    """
+
+    def __init__(self, tokens):
+        super().__init__(tokens)
+        self.step_productions = self.bind_productions(STATEMENT_STEP_KINDS)
+
+    def run_steps(self, steps):
+        """Drives step generators to completion and returns the outermost result."""
+        stack = [steps]
+        result = None
+        while stack:
+            try:
+                nested = stack[-1].send(result)
+            except StopIteration as stop:
+                stack.pop()
+                result = stop.value
+            else:
+                stack.append(nested)
+                result = None
+        return result
+
+    def statement(self):
+        return self.run_steps(self.statement_steps())
+
+    def block(self):
+        return self.run_steps(self.block_steps())
+
+    def parse_statement_block(self):
+        return self.run_steps(self.statement_block_steps())
+
+    def parse_conditional_statement(self):
+        return self.run_steps(self.conditional_steps())
+
+    def parse_iterative_statement(self):
+        return self.run_steps(self.loop_steps())
+
+    def statement_steps(self):
+        steps = self.step_productions.get((self.current_token.kind, self.current_token.value))
+        if steps is not None:
+            return (yield steps())
+        return super().statement()
+
+    def block_steps(self):
+        reused = self.reuse_block()
+        if reused is not None:
+            return reused
+        self.open_span()
+        self.expect(TokenKind.L_CURLY, "Expected '{' to start block")
+        statements = []
+        while self.current_token.kind != TokenKind.R_CURLY:
+            statements.append((yield self.statement_steps()))
+            if self.current_token and self.current_token.kind == TokenKind.SEMICOLON:
+                self.advance()
+        self.expect(TokenKind.R_CURLY, "Expected '}' to end block")
+        return self.close_span(ASTNode(type_="Block", children=statements))
+
+    def statement_block_steps(self):
+        if self.current_token.kind == TokenKind.L_CURLY:
+            return (yield self.block_steps())
+        stmt = yield self.statement_steps()
+        return ASTNode(type_="Block", children=[stmt])
+
+    def loop_steps(self):
+        keyword = self.current_token.value
+        self.advance()
+
+        if keyword == 'while':
+            condition = self.parse_while_header()
+            body = yield self.block_steps()
+            return ASTNode(type_="WhileLoop", children=[condition, body])
+        elif keyword == 'for':
+            initializer, condition, update = self.parse_for_header()
+            body = yield self.block_steps()
+            return ASTNode(type_="ForLoop", children=[initializer, condition, update, body])
+        elif keyword == 'repeat':
+            times = self.parse_repeat_header()
+            body = yield self.block_steps()
+            return ASTNode(type_="RepeatLoop", children=[times, body])
+        else:
+            raise UnexpectedTokenError(
+                self.current_token.pos_start,
+                self.current_token.pos_end,
+                f"Unsupported loop keyword: {keyword}"
+            )
+
+    def conditional_steps(self):
+        children = []
+        while True:
+            condition = self.parse_if_header()
+            true_block = yield self.statement_block_steps()
+            children.append(ASTNode(type_="IfClause", children=[condition, true_block]))
+
+            if not (self.current_token and self.current_token.kind == TokenKind.KEYWORD and self.current_token.value == 'else'):
+                break
+            self.advance()
+            if not (self.current_token and self.current_token.value == 'if'):
+                children.append((yield self.statement_block_steps()))
+                break
+
+        return ASTNode(type_="ConditionalStatement", children=children)
+
+    def expr(self, min_binding_power=0):
+        """
+        Parser.expr without recursion. Each open operator, parenthesis or
+        call argument list is a frame of (kind, binding power, node or token,
+        extra); a frame is closed once the operand after it is complete.
+        """
+        frames = []
+        while True:
+            # Read one operand, opening a frame for every prefix operator,
+            # '(' and 'name(' in front of it.
+            token = self.current_token
+            prefix = PREFIX_OPERATORS.get((token.kind, token.value)) if token else None
+            if prefix:
+                self.advance()
+                frames.append(("prefix", PREFIX_BINDING_POWER, token, prefix))
+                continue
+            if token and token.kind == TokenKind.L_PARENTHESIS:
+                self.advance()  # Consume '('
+                frames.append(("parenthesis", 0, token, None))
+                continue
+            if token and NAME_KINDS >> token.kind & 1:
+                nxt = self.peek()
+                if nxt and nxt.kind == TokenKind.L_PARENTHESIS:
+                    self.advance()  # consume the function name token
+                    left = self.open_call(ASTNode(type_="Identifier", value=token.value), frames)
+                    if left is None:
+                        continue
+                else:
+                    left = self.factor()
+            else:
+                left = self.factor()
+
+            # Bind operators and close frames until another operand is needed.
+            while True:
+                token = self.current_token
+                if token and token.kind == TokenKind.L_PARENTHESIS:
+                    left = self.open_call(left, frames)
+                    if left is None:
+                        break
+                    continue
+                powers = INFIX_BINDING_POWERS.get((token.kind, token.value)) if token else None
+                if powers and powers[0] >= (frames[-1][1] if frames else min_binding_power):
+                    self.advance()
+                    frames.append(("binary", powers[1], token, left))
+                    break
+
+                if not frames:
+                    return left
+                frame, _, opener, extra = frames.pop()
+                if frame == "binary":
+                    left = ASTNode(type_="BinaryOp", value=opener.value, children=[extra, left])
+                elif frame == "prefix":
+                    left = ASTNode(type_=extra, value=opener.value, children=[left])
+                elif frame == "parenthesis":
+                    left = self.close_parenthesized(opener, left)
+                else:
+                    extra.append(left)
+                    if self.current_token.kind == TokenKind.SEPARATING_SYMBOL:
+                        self.advance()
+                        frames.append((frame, 0, opener, extra))
+                        break
+                    left = self.finish_function_call(opener, extra)
+
+    def open_call(self, identifier_node, frames):
+        """Starts a call on identifier_node: returns the node if it has no arguments, else opens a frame for them."""
+        self.expect(TokenKind.L_PARENTHESIS, "Expected '(' after function name")
+        if self.current_token.kind == TokenKind.R_PARENTHESIS:
+            return self.finish_function_call(identifier_node, [])
+        frames.append(("call", 0, identifier_node, []))
+        return None
+
+##################################
+#           STREAMING            #
+##################################
+
+def lexer_tokens(items, lexer_errors):
+    """Yields the tokens of an iter_tokens() or lex_chunks() stream, appending its errors to lexer_errors."""
+    for item in items:
+        if isinstance(item, Error):
+            lexer_errors.append(item)
+        else:
+            yield item
+
+
+def streaming_parser(source, fn="input", lexer_errors=None, parser_class=Parser):
+    """
+    Returns a parser that lexes source only as far as it has parsed, so
+    iter_statements() hands out each top-level statement as soon as it is
+    complete. source is a string or an iterable of text chunks such as an
+    open file. Lexer errors go to lexer_errors and their characters are
+    skipped; unlike analyze(), they do not stop parsing.
+    """
+    items = Lexer(fn, source).iter_tokens() if isinstance(source, str) else lex_chunks(fn, source)
+    return parser_class(lexer_tokens(items, [] if lexer_errors is None else lexer_errors))
+
+##################################
+#          INCREMENTAL           #
+##################################
+
+def changed_token_range(old_tokens, new_tokens):
+    """
+    Returns (start, old_end, new_end) such that old_tokens[start:old_end]
+    became new_tokens[start:new_end], comparing tokens by kind and value.
+    """
+    limit = min(len(old_tokens), len(new_tokens))
+    start = 0
+    while (start < limit and old_tokens[start].kind == new_tokens[start].kind
+           and old_tokens[start].value == new_tokens[start].value):
+        start += 1
+    old_end, new_end = len(old_tokens), len(new_tokens)
+    while (old_end > start and new_end > start and old_tokens[old_end - 1].kind == new_tokens[new_end - 1].kind
+           and old_tokens[old_end - 1].value == new_tokens[new_end - 1].value):
+        old_end -= 1
+        new_end -= 1
+    return start, old_end, new_end
+
+
+def spanned_nodes(node, start):
+    """Yields (node, first token, end) for every node with a span below node, whose first token is start."""
+    anchors = [start]
+    stack = [(child, 0, False) for child in reversed(node.children) if child is not None]
+    while stack:
+        node, depth, closing = stack.pop()
+        if closing:
+            anchors.pop()
+            continue
+        if node.span is not None:
+            offset, length = node.span
+            node_start = anchors[depth] + offset
+            anchors[depth] = node_start + length
+            yield node, node_start, node_start + length
+            # Its descendants count from its first token until it closes.
+            stack.append((node, depth, True))
+            anchors.append(node_start)
+            depth += 1
+        stack.extend((child, depth, False) for child in reversed(node.children) if child is not None)
+
+
+class ResumePoints:
+    """
+    The token index in the new stream of each old top-level statement past
+    an edit, worked out only as far as a reparse asks for: the queries come
+    in increasing order, so each statement is looked at once.
+    """
+
+    def __init__(self, statements, index, start, shift):
+        self.statements = statements
+        self.index = index
+        self.start = start  # Old first token of statements[index]
+        self.shift = shift
+
+    def __contains__(self, pos):
+        statements = self.statements
+        while self.index < len(statements) and self.start + self.shift < pos:
+            offset, length = statements[self.index].span
+            self.index += 1
+            if self.index < len(statements):
+                self.start += length + statements[self.index].span[0]
+        return self.index < len(statements) and self.start + self.shift == pos
+
+    def tail(self):
+        """The old statements from the one the reparse stopped at."""
+        return self.statements[self.index:]
+
+
+def reparse(previous_ast, old_tokens, new_tokens, changed=None, parser_class=Parser):
+    """
+    Parses new_tokens, an edit of old_tokens that previous_ast was parsed
+    from, and returns (ast, syntax errors) like analyze(). changed is the
+    (start, old_end, new_end) of the edit in tokens, as changed_token_range
+    computes it when it is left out. Top-level statements before the edit
+    are kept as they are. Parsing restarts at the first statement the edit
+    touches, skips over every block inside the damaged statements whose
+    tokens did not change, and stops as soon as it reaches the first token
+    of an old statement past the edit; the old statements from there on are
+    reused too. Both token streams must be lists. The new tree shares nodes
+    with previous_ast, and the syntax errors are those of the reparsed region.
+    """
+    start, old_end, new_end = changed if changed is not None else changed_token_range(old_tokens, new_tokens)
+    shift = new_end - old_end
+    statements = previous_ast.children if previous_ast is not None else []
+
+    # A statement reads the token after it (an if checks for 'else'), so it
+    # is only safe to keep if that token is unchanged too.
+    kept = 0
+    restart = 0
+    while kept < len(statements) and statements[kept].span is not None:
+        offset, length = statements[kept].span
+        if restart + offset + length >= start:
+            break
+        restart += offset + length
+        kept += 1
+
+    # Blocks read nothing outside their braces, so one whose tokens are all
+    # outside the edit can be reused wherever it lands.
+    reusable_blocks = {}
+    index = kept
+    statement_end = restart
+    resume_points = ResumePoints(statements, len(statements), 0, shift)
+    while index < len(statements) and statements[index].span is not None:
+        offset, length = statements[index].span
+        statement_start = statement_end + offset
+        if statement_start >= old_end:
+            resume_points = ResumePoints(statements, index, statement_start, shift)
+            break
+        statement_end = statement_start + length
+        for node, node_start, node_end in spanned_nodes(statements[index], statement_start):
+            if node.type != "Block":
+                continue
+            if node_end <= start:
+                reusable_blocks[node_start] = (node, node_end - node_start)
+            elif node_start >= old_end:
+                reusable_blocks[node_start + shift] = (node, node_end - node_start)
+        index += 1
+
+    parser = parser_class(new_tokens)
+    parser.reusable_blocks = reusable_blocks
+    parser.span_anchors[0] = restart
+    parser.seek(restart)
+    children = statements[:kept]
+    children.extend(parser.iter_statements(stop_at=resume_points))
+    if parser.pos in resume_points:
+        tail = resume_points.tail()
+        tail[0].span = (parser.pos - parser.span_anchors[0], tail[0].span[1])
+        children.extend(tail)
+    return (ASTNode(type_="Program", children=children) if children else None), parser.syntax_errors
+
+##################################
+#            ASYNC               #
+##################################
+
+import asyncio
+
+
+def analyze(text, fn="input"):
+    """Lexes and parses text; returns (ast, lexer errors) or (ast, syntax errors) like run_parser, without printing."""
+    tokens, errors = Lexer(fn, text).make_tokens()
+    if errors:
+        return None, errors
+    parser = Parser(tokens)
+    return parser.parse(), parser.syntax_errors
+
+
+async def analyze_async(text, fn="input", executor=None, tokens_per_yield=ASYNC_TOKENS_PER_YIELD,
+                        statements_per_yield=ASYNC_STATEMENTS_PER_YIELD):
+    """
+    analyze() for asyncio code. By default it runs on the event loop and
+    hands control back every tokens_per_yield tokens while lexing and every
+    statements_per_yield statements while parsing; cancelling the awaiting
+    task stops it at the next of those points. Given an executor, the whole
+    analysis runs there instead; cancelling then only stops the wait.
+    """
+    if executor is not None:
+        return await asyncio.get_running_loop().run_in_executor(executor, analyze, text, fn)
+
+    tokens = []
+    errors = []
+    for count, item in enumerate(Lexer(fn, text).iter_tokens(), 1):
+        if isinstance(item, Error):
+            errors.append(item)
+        else:
+            tokens.append(item)
+        if count % tokens_per_yield == 0:
+            await asyncio.sleep(0)
+    if errors:
+        return None, errors
+    parser = Parser(tokens)
+    return await parser.parse_async(statements_per_yield), parser.syntax_errors
+
 
 from prettytable import PrettyTable
 
@@ -0,0 +1,197 @@
+import io
+import sys
+
+from parser import ASTNode, Parser, StackParser, changed_token_range, reparse, streaming_parser
+from tokenizer import DATA_TYPES, KEYWORDS, RESERVED_WORDS, LineIndex, Position, Token
+
+# Parser reads the token types LexicalAnalyzer's make_symbol emits, so these
+# tests build their token lists directly from space-separated lexemes.
+SYMBOL_TYPES = {
+    '=': 'ASSIGN_OP', ';': 'SEMICOLON', ',': 'SEPARATING_SYMBOL',
+    '(': 'L_PARENTHESIS', ')': 'R_PARENTHESIS', '{': 'L_CURLY', '}': 'R_CURLY',
+    '+': 'ADD_OPERATOR', '*': 'MULTIPLY_OP', '<': 'LESS_THAN', '==': 'EQUAL_TO',
+    '-': 'ARITHMETIC_OPERATOR', '++': 'INCREMENT_UNARY_OP', '.': 'ACCESSOR_SYMBOL',
+}
+
+
+def tokenize(source, fn="test"):
+    """Yields a Token for each space-separated lexeme of source, then EOF."""
+    lines = LineIndex(fn, source)
+    idx = 0
+    for lexeme in source.split():
+        idx = source.index(lexeme, idx)
+        if lexeme in SYMBOL_TYPES:
+            type_, value = SYMBOL_TYPES[lexeme], lexeme
+        elif lexeme.isdigit():
+            type_, value = 'INTEGER', int(lexeme)
+        elif lexeme in DATA_TYPES:
+            type_, value = 'DATA_TYPE', lexeme
+        elif lexeme in KEYWORDS:
+            type_, value = 'KEYWORD', lexeme
+        elif lexeme in RESERVED_WORDS:
+            type_, value = 'RESERVED_WORD', lexeme
+        else:
+            type_, value = 'IDENTIFIER', lexeme
+        yield Token(type_, value, Position(idx, lines), Position(idx + len(lexeme), lines))
+        idx += len(lexeme)
+    yield Token('EOF', None, Position(idx, lines), Position(idx, lines))
+
+
+def parse(source, parser_class=Parser):
+    parser = parser_class(list(tokenize(source)))
+    return parser.parse(), parser.syntax_errors
+
+
+def test_iter_statements_yields_before_the_stream_ends():
+    pulled = []
+
+    def tokens():
+        for token in tokenize("int a = 1 ; int b = 2 ; int c = 3 ;"):
+            pulled.append(token)
+            yield token
+
+    statements = Parser(tokens()).iter_statements()
+    first = next(statements)
+    assert first.type == "VariableDeclaration"
+    assert pulled[-1].type != 'EOF'
+    assert len(list(statements)) == 2
+
+
+def test_streaming_parser_reads_chunks_on_demand():
+    read = []
+
+    def chunks():
+        for chunk in ("int a;\n", "int b;\n", "int c;\n"):
+            read.append(chunk)
+            yield chunk
+
+    parser = streaming_parser(chunks())
+    assert parser.current_token.value == 'int'
+    assert len(read) == 1
+
+
+def test_iter_statements_skips_a_stray_statement_starter():
+    ast, errors = parse("else ; int a = 1 ;")
+    assert errors
+    assert [node.type for node in ast.children] == ["VariableDeclaration"]
+
+
+RELOOP = "int a = 1 ; while ( a < 10 ) { a = a + 1 ; if ( a == 3 ) { b = 2 ; } else { c = 3 ; } } int b = 2 ; x = 5 ;"
+
+
+def check_reparse(source, edited, parser_class=Parser):
+    old_tokens = list(tokenize(source))
+    new_tokens = list(tokenize(edited))
+    previous_ast = parser_class(old_tokens).parse()
+    ast, _ = reparse(previous_ast, old_tokens, new_tokens, parser_class=parser_class)
+    full = parser_class(new_tokens).parse()
+    assert repr(ast) == repr(full)
+    assert [node.span for node in ast.children] == [node.span for node in full.children]
+    return previous_ast, ast
+
+
+def test_reparse_matches_a_full_parse():
+    for parser_class in (Parser, StackParser):
+        for old, new in [("c = 3", "c = 4 + d"), ("int a = 1 ;", "int a = 2 ;"), ("x = 5 ;", "x = 6 ; y = 7 ;"),
+                         ("b = 2 ; }", "b = 2 ; } else { d = 1 ; }"), ("while", "while ( a ) { } while"),
+                         ("int b = 2 ;", ""), ("( a == 3 )", "( a == 4 )")]:
+            check_reparse(RELOOP, RELOOP.replace(old, new, 1), parser_class)
+
+
+def test_reparse_reuses_untouched_statements_and_blocks():
+    previous_ast, ast = check_reparse(RELOOP, RELOOP.replace("c = 3", "c = 4"))
+    old_first, old_loop, old_decl, old_assign = previous_ast.children
+    first, loop, decl, assign = ast.children
+    assert first is old_first and decl is old_decl and assign is old_assign
+    assert loop is not old_loop
+
+    def if_block(loop):
+        return loop.children[1].children[1].children[0].children[1]
+    assert if_block(loop) is if_block(old_loop)
+
+
+def test_changed_token_range():
+    old_tokens = list(tokenize("a = 1 ; b = 2 ;"))
+    new_tokens = list(tokenize("a = 1 ; b = 2 + 3 ;"))
+    assert changed_token_range(old_tokens, new_tokens) == (7, 7, 9)
+
+
+def test_productions_are_bound_per_parser_class():
+    class CountingParser(Parser):
+        declarations = 0
+
+        def declaration(self, expect_semicolon=True):
+            CountingParser.declarations += 1
+            return super().declaration(expect_semicolon)
+
+    ast, errors = parse("int a = 1 ; b = areaOf . square ; int c = 2 ;", CountingParser)
+    assert not errors
+    assert CountingParser.declarations == 2
+    assert ast.children[1].children[0].type == "MemberAccess"
+
+
+def test_signed_and_binary_initializers():
+    for source in ("int x = 1 + 2 ;", "int x = - 1 ;", "int x = y ;"):
+        for parser_class in (Parser, StackParser):
+            ast, errors = parse(source, parser_class)
+            assert not errors
+            assert ast.children[0].type == "VariableDeclaration"
+
+
+def test_expression_trees():
+    ast, errors = parse("x = 1 + 2 * 3 ; y = ( - a ) ; z = - 1 + b ;")
+    assert not errors
+    sum_, parenthesized, signed_sum = (node.children[0] for node in ast.children)
+    assert parenthesized.type == "Parenthesized Expression"
+    negation = parenthesized.children[0]
+    assert (sum_.type, sum_.value) == ("BinaryOp", '+')
+    assert [child.value for child in sum_.children] == [1, '*']
+    assert (negation.type, negation.value) == ("Unary Operator", '-')
+    assert (signed_sum.type, signed_sum.value) == ("BinaryOp", '+')
+    assert (signed_sum.children[0].type, signed_sum.children[0].value) == ("Unary Operator", '-')
+
+
+def test_unknown_token_kind_is_a_syntax_error():
+    tokens = [Token('IDENTIFIER', 'x'), Token('ASSIGN_OP', '='), Token('MYSTERY', '?'), Token('SEMICOLON', ';'), Token('EOF')]
+    for parser_class in (Parser, StackParser):
+        parser = parser_class(tokens)
+        parser.parse()
+        assert [error['Details'] for error in parser.syntax_errors] == ["Unexpected token: MYSTERY"]
+
+
+def nested(depth):
+    """A program with depth nested if blocks around depth nested parentheses."""
+    return "if ( a ) { " * depth + "x = " + "( " * depth + "a + 1" + " )" * depth + " ;" + " }" * depth
+
+
+def test_stack_parser_agrees_with_parser_on_deep_nesting():
+    for depth in (1, 10, 60):
+        ast, errors = parse(nested(depth))
+        stack_ast, stack_errors = parse(nested(depth), StackParser)
+        assert not errors and not stack_errors
+        assert repr(stack_ast) == repr(ast)
+
+
+def test_stack_parser_handles_nesting_past_the_recursion_limit():
+    depth = sys.getrecursionlimit() * 2
+    ast, errors = parse(nested(depth), StackParser)
+    assert not errors
+    assert sum(1 for line in ast.iter_lines() if "Parenthesized Expression" in line) == depth
+
+
+def recursive_drawing(node, level=0, is_last=True):
+    """The recursive ASTNode.__repr__ that iter_lines replaced."""
+    prefix = "    " * level + ("└── " if is_last else "├── ")
+    value_str = str(node.value) if node.value is not None else ""
+    ret = f"{prefix}{node.type}: {value_str}\n"
+    for i, child in enumerate(node.children):
+        ret += recursive_drawing(child, level + 1, is_last=(i == len(node.children) - 1))
+    return ret
+
+
+def test_write_matches_the_recursive_drawing():
+    ast, _ = parse(RELOOP + " " + nested(8))
+    out = io.StringIO()
+    ast.write(out)
+    assert out.getvalue() == repr(ast) == recursive_drawing(ast)
+    assert repr(ast.children[1]) == recursive_drawing(ast.children[1])
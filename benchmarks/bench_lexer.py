@@ -0,0 +1,267 @@
+"""
+Lexer micro-benchmarks.
+
+Generates synthetic corpora that each stress one lexer path and times
+Lexer.make_tokens on them for both analyzers. Every measurement runs in a
+fresh interpreter, so its peak RSS belongs to that run alone, and once more
+under tracemalloc for the memory it allocates. Results are written as JSON.
+
+    python benchmarks/bench_lexer.py --sizes 1K,100K --output bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VARIANTS = {
+    'lexical': os.path.join(ROOT, 'LexicalAnalyzer'),
+    'syntax': os.path.join(ROOT, 'SyntaxAnalyzer'),
+}
+DEFAULT_SIZES = '1K,10K,100K,1M,10M,100M'
+SIZE_SUFFIXES = {'K': 1000, 'M': 1000 ** 2, 'G': 1000 ** 3}
+# Small inputs are lexed again until this many seconds have passed, and the
+# fastest run is reported.
+MIN_BENCH_TIME = 0.5
+# A corpus is made of one generated block of at most this many characters,
+# repeated up to the requested size.
+CORPUS_BLOCK_SIZE = 1 << 20
+
+#######################################
+#              CORPORA                #
+#######################################
+
+DATA_TYPES = ['int', 'float', 'double', 'char', 'boolean', 'String', 'long']
+KEYWORDS = ['if', 'else', 'while', 'for', 'repeat', 'println', 'print', 'input']
+RESERVED_WORDS = ['areaOf', 'circle', 'radius', 'cm', 'length', 'width']
+OPERATORS = [
+    '+', '-', '*', '/', '%', '**', '=', '+=', '-=', '*=', '/=', '**=', '<<=', '>>=',
+    '==', '!=', '<', '>', '<=', '>=', '&&', '||', '!', '&', '`', '^', '<<', '>>', '++', '--',
+]
+ILLEGAL_CHARS = '@$?\x01\x7f'
+
+
+def identifier(rnd):
+    return rnd.choice('abcdefghijklmnopqrstuvwxyz') + ''.join(
+        rnd.choice('abcdefghijklmnopqrstuvwxyz0123456789_') for _ in range(rnd.randint(0, 9)))
+
+
+def identifier_line(rnd):
+    words = [rnd.choice(DATA_TYPES), identifier(rnd), '=', identifier(rnd), ';']
+    if rnd.random() < 0.5:
+        words = [rnd.choice(KEYWORDS), '(', identifier(rnd), ')', '{'] + words + ['}']
+    if rnd.random() < 0.2:
+        words[-2:-2] = [rnd.choice(RESERVED_WORDS) + '.' + identifier(rnd)]
+    return ' '.join(words)
+
+
+def operator_line(rnd):
+    words = [identifier(rnd)[:2]]
+    for _ in range(rnd.randint(4, 12)):
+        words.append(rnd.choice(OPERATORS))
+        words.append(identifier(rnd)[:2])
+    return ''.join(words) + ';'
+
+
+def number_line(rnd):
+    numbers = []
+    for _ in range(rnd.randint(4, 12)):
+        if rnd.random() < 0.5:
+            numbers.append(str(rnd.randint(0, 10 ** rnd.randint(1, 7))))
+        else:
+            numbers.append(f'{rnd.uniform(0, 10 ** rnd.randint(1, 5)):.{rnd.randint(1, 8)}f}')
+    return 'x = ' + ' = '.join(numbers) + ';'
+
+
+def string_line(rnd):
+    parts = []
+    for _ in range(rnd.randint(4, 16)):
+        if rnd.random() < 0.3:
+            parts.append('{' + identifier(rnd) + '} ')
+        elif rnd.random() < 0.1:
+            parts.append(rnd.choice(['\\n', '\\t', '\\"', '\\\\']))
+        else:
+            parts.append(' '.join(identifier(rnd) for _ in range(rnd.randint(2, 8))) + ' ')
+    return 'println("' + ''.join(parts) + '");'
+
+
+def comment_line(rnd):
+    text = ' '.join(identifier(rnd) for _ in range(rnd.randint(3, 12)))
+    if rnd.random() < 0.5:
+        return '# ' + text
+    return '## ' + text + '\n' + text + ' ##'
+
+
+def error_line(rnd):
+    words = []
+    for _ in range(rnd.randint(4, 12)):
+        roll = rnd.random()
+        if roll < 0.4:
+            words.append(''.join(rnd.choice(ILLEGAL_CHARS) for _ in range(rnd.randint(1, 4))))
+        elif roll < 0.6:
+            words.append(str(rnd.randint(0, 99)) + identifier(rnd))
+        elif roll < 0.8:
+            words.append('_' + identifier(rnd))
+        else:
+            words.append("'" + identifier(rnd)[:3] + "'")
+    return ' '.join(words)
+
+
+CORPORA = {
+    'identifiers': identifier_line,
+    'operators': operator_line,
+    'numbers': number_line,
+    'strings': string_line,
+    'comments': comment_line,
+    'errors': error_line,
+}
+
+
+def generate_corpus(name, size, seed=0):
+    """Returns exactly size characters of the named corpus, the same for the same seed."""
+    rnd = random.Random(seed)
+    make_line = CORPORA[name]
+    lines = []
+    length = 0
+    while length < min(size, CORPUS_BLOCK_SIZE):
+        line = make_line(rnd) + '\n'
+        lines.append(line)
+        length += len(line)
+    block = ''.join(lines)
+    return (block * (size // len(block) + 1))[:size]
+
+#######################################
+#             MEASUREMENT             #
+#######################################
+
+def measure(variant, engine, corpus, size):
+    """Lexes one corpus in this process and returns its result record."""
+    sys.path.insert(0, VARIANTS[variant])
+    import tokenizer
+
+    text = generate_corpus(corpus, size)
+    start = time.perf_counter()
+    tokens, errors = tokenizer.Lexer('bench.lit', text, engine).make_tokens()
+    best = time.perf_counter() - start
+    token_count = len(tokens)
+    error_count = len(errors)
+    del tokens, errors
+
+    spent = best
+    while spent < MIN_BENCH_TIME:
+        start = time.perf_counter()
+        tokenizer.Lexer('bench.lit', text, engine).make_tokens()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        spent += elapsed
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # tracemalloc slows lexing down several times over, so the traced run
+    # comes after the timed ones and after peak RSS is read.
+    tracemalloc.start()
+    try:
+        tokenizer.Lexer('bench.lit', text, engine).make_tokens()
+        traced_peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    items = token_count + error_count
+    return {
+        'variant': variant,
+        'engine': engine,
+        'corpus': corpus,
+        'size_bytes': size,
+        'tokens': token_count,
+        'errors': error_count,
+        'seconds': best,
+        'tokens_per_sec': token_count / best if best else None,
+        'mb_per_sec': size / best / 1e6 if best else None,
+        # Peak memory allocated while make_tokens runs, the returned tokens
+        # included, per token or error.
+        'peak_traced_bytes_per_token': traced_peak / items if items else None,
+        'peak_rss_kb': peak_rss_kb,
+    }
+
+
+def run_worker(variant, engine, corpus, size):
+    """Runs measure() in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', variant, engine, corpus, str(size)],
+        capture_output=True, text=True,
+    )
+    if result.returncode:
+        return {'variant': variant, 'engine': engine, 'corpus': corpus, 'size_bytes': size,
+                'error': result.stderr.strip().splitlines()[-1] if result.stderr else 'failed'}
+    return json.loads(result.stdout)
+
+#######################################
+#                RUN                  #
+#######################################
+
+def parse_size(text):
+    text = text.strip().upper()
+    if text[-1:] in SIZE_SUFFIXES:
+        return int(float(text[:-1]) * SIZE_SUFFIXES[text[-1]])
+    return int(text)
+
+
+def parse_list(text, choices):
+    values = [value.strip() for value in text.split(',') if value.strip()]
+    for value in values:
+        if value not in choices:
+            raise argparse.ArgumentTypeError(f"'{value}' is not one of: {', '.join(choices)}")
+    return values
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description='Benchmark Lexer.make_tokens on synthetic corpora.')
+    arg_parser.add_argument('--variants', default=','.join(VARIANTS),
+                            type=lambda text: parse_list(text, list(VARIANTS)))
+    arg_parser.add_argument('--engines', default='char',
+                            type=lambda text: parse_list(text, ['char', 'regex', 'dfa']))
+    arg_parser.add_argument('--corpora', default=','.join(CORPORA),
+                            type=lambda text: parse_list(text, list(CORPORA)))
+    arg_parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                            type=lambda text: [parse_size(size) for size in text.split(',')])
+    arg_parser.add_argument('--output', help='write the JSON here instead of to stdout')
+    arg_parser.add_argument('--worker', nargs=4, metavar=('VARIANT', 'ENGINE', 'CORPUS', 'SIZE'),
+                            help=argparse.SUPPRESS)
+    args = arg_parser.parse_args(argv)
+
+    if args.worker:
+        variant, engine, corpus, size = args.worker
+        print(json.dumps(measure(variant, engine, corpus, int(size))))
+        return
+
+    results = []
+    for variant in args.variants:
+        for engine in args.engines:
+            for corpus in args.corpora:
+                for size in args.sizes:
+                    record = run_worker(variant, engine, corpus, size)
+                    results.append(record)
+                    print(f"{variant:8} {engine:5} {corpus:12} {size:>10} "
+                          + (f"{record['mb_per_sec']:8.2f} MB/s" if 'error' not in record else record['error']),
+                          file=sys.stderr)
+
+    report = json.dumps({
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(report + '\n')
+    else:
+        print(report)
+
+
+if __name__ == '__main__':
+    main()
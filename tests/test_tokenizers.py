@@ -0,0 +1,305 @@
+"""
+Tests for the lexers of both analyzers.
+
+LexicalAnalyzer and SyntaxAnalyzer each ship a tokenizer.py, so they are
+loaded here under their own module names and every shared test runs once
+per analyzer.
+"""
+
+import asyncio
+import importlib.util
+import io
+import random
+import sys
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+ANALYZERS = {
+    'lexical': ROOT / 'LexicalAnalyzer',
+    'syntax': ROOT / 'SyntaxAnalyzer',
+}
+
+SAMPLE = '''# comment #
+int choice = input();
+float r = 3.5e2, q = .5;
+char c = 'a';
+bool on = true;
+if(choice == 1 && !on || r >= 2) {
+   ASquare = areaOf.square;
+   println("area {ASquare} m");
+}
+else { x += 1; x -= 2; x *= 3; x /= 4; x %= 5; x ^= 6; x //= 7; x **= 8; x &= 9; x |= 1; x <<= 2; x >>= 3;
+   x++; y--; z = ~a << 2 >> 1 & b | c ^ d % e // f ** g != h <= i < j > k;
+   w = [1, 2]; at @ hash $ tilde ` back \\ colon : pipe ;
+}
+'''
+
+
+def load_tokenizer(analyzer):
+    """Imports an analyzer's tokenizer.py as the module <analyzer>_tokenizer."""
+    name = f'{analyzer}_tokenizer'
+    if name not in sys.modules:
+        directory = str(ANALYZERS[analyzer])
+        spec = importlib.util.spec_from_file_location(name, ANALYZERS[analyzer] / 'tokenizer.py')
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        sys.path.insert(0, directory)
+        try:
+            spec.loader.exec_module(module)
+        finally:
+            sys.path.remove(directory)
+    return sys.modules[name]
+
+
+@pytest.fixture(params=list(ANALYZERS))
+def tokenizer(request):
+    return load_tokenizer(request.param)
+
+
+@pytest.fixture
+def lexical_tokenizer():
+    return load_tokenizer('lexical')
+
+
+@pytest.fixture
+def syntax_tokenizer():
+    return load_tokenizer('syntax')
+
+
+def offset(position):
+    return getattr(position, 'idx', None)
+
+
+def lexed(tokenizer, source, engine='char', **options):
+    """The tokens and errors of source as plain tuples, for comparing runs."""
+    return as_tuples(*tokenizer.Lexer("source.lit", source, engine, **options).make_tokens())
+
+
+def as_tuples(tokens, errors):
+    return ([(token.type, token.value, offset(getattr(token, 'pos_start', None))) for token in tokens],
+            [(error.error_name, error.details, error.pos_start.idx, error.pos_end.idx) for error in errors])
+
+
+def scanned(items):
+    return [(type(item).__name__, getattr(item, 'type', None), getattr(item, 'value', None),
+             getattr(item, 'details', None), offset(getattr(item, 'pos_start', None)),
+             offset(getattr(item, 'pos_end', None))) for item in items]
+
+
+def split_at_random(text, rng, max_size):
+    chunks, start = [], 0
+    while start < len(text):
+        size = rng.randint(1, max_size)
+        chunks.append(text[start:start + size])
+        start += size
+    return chunks
+
+
+def lex_stream(tokenizer, data, **options):
+    async def lex():
+        stream = asyncio.StreamReader()
+        stream.feed_data(data)
+        stream.feed_eof()
+        return await tokenizer.lex_async("source.lit", stream, **options)
+    return asyncio.run(lex())
+
+
+def test_dfa_module_copies_are_identical():
+    assert (ANALYZERS['syntax'] / "dfa.py").read_text() == (ANALYZERS['lexical'] / "dfa.py").read_text()
+
+
+def test_write_source_copies_a_mapped_file_in_slices(tokenizer, tmp_path, monkeypatch):
+    path = tmp_path / "source.lit"
+    path.write_text("int a = 1;\nprintln(\"{a}\");\n" * 5)
+    monkeypatch.setattr(tokenizer, "MAPPED_WRITE_SIZE", 7)
+    text = tokenizer.read_source(path)
+    try:
+        assert isinstance(text, tokenizer.MappedSource)
+        out = io.StringIO()
+        tokenizer.write_source(out, text)
+        assert out.getvalue() == path.read_text()
+    finally:
+        text.close()
+    assert text.mapping.closed
+
+
+def test_lex_async_decodes_across_reads(tokenizer):
+    source = 'x = "é";\n' * 3
+    tokens, errors = lex_stream(tokenizer, source.encode(), chunk_size=3)
+    expected, expected_errors = tokenizer.Lexer("source.lit", source).make_tokens()
+    assert [(token.type, token.value) for token in tokens] == [(token.type, token.value) for token in expected]
+    assert len(errors) == len(expected_errors)
+
+
+def test_lex_async_rejects_a_truncated_trailing_sequence(tokenizer):
+    with pytest.raises(UnicodeDecodeError):
+        lex_stream(tokenizer, b"x = 1;\xc3")
+
+
+def test_max_errors_keeps_every_token(tokenizer):
+    source = "a ? b ? c ? d ? e;"
+    tokens, errors = tokenizer.Lexer("source.lit", source).make_tokens()
+    lexer = tokenizer.Lexer("source.lit", source, max_errors=2)
+    capped_tokens, capped_errors = lexer.make_tokens()
+    assert len(errors) == 4
+    assert [(token.type, token.value) for token in capped_tokens] == [(token.type, token.value) for token in tokens]
+    assert len(capped_errors) == 2
+    assert lexer.suppressed_errors == 2
+
+
+def test_engines_only_produce_known_token_kinds(tokenizer):
+    for engine in tokenizer.LEXER_ENGINES:
+        tokens, _ = tokenizer.Lexer("source.lit", SAMPLE, engine).make_tokens()
+        assert [token.type for token in tokens if token.kind == tokenizer.UNKNOWN_KIND] == []
+
+
+def test_engines_agree(tokenizer):
+    sources = [SAMPLE, "", "x = \"open string\ny = 1;", "## block\ncomment ## a = 2;", "12abc 1.2.3 .5e-3 0x1F",
+               "println(\"a{b}c{d}\");", "a ?? b @@ c", "int\tx\r\n=\v1;"]
+    for source in sources:
+        expected = lexed(tokenizer, source)
+        for engine in tokenizer.LEXER_ENGINES:
+            assert lexed(tokenizer, source, engine) == expected, (source, engine)
+
+
+def test_lex_chunks_matches_iter_tokens_for_any_split(tokenizer):
+    rng = random.Random(10)
+    sources = [SAMPLE, "x = \"open string\ny = 1;", "## block\ncomment ## a = 2;", "12abc 1.2.3 .5e-3", "a ?? b"]
+    for source in sources:
+        expected = scanned(tokenizer.Lexer("source.lit", source).iter_tokens())
+        assert scanned(tokenizer.lex_chunks("source.lit", source)) == expected
+        for max_size in (2, 5, 17, 64):
+            for _ in range(20):
+                chunks = split_at_random(source, rng, max_size)
+                assert scanned(tokenizer.lex_chunks("source.lit", chunks)) == expected, chunks
+
+
+def test_coalesce_errors_reports_each_run_once(tokenizer):
+    source = "a ?\x01? b ?? c ; .?"
+    for engine in tokenizer.LEXER_ENGINES:
+        tokens, errors = tokenizer.Lexer("source.lit", source, engine, coalesce_errors=True).make_tokens()
+        assert [(error.illegal_char, error.pos_start.idx, error.pos_end.idx) for error in errors] == \
+            [("?\x01?", 2, 5), ("??", 8, 10), (".?", 15, 17)]
+        uncoalesced, _ = tokenizer.Lexer("source.lit", source, engine).make_tokens()
+        assert [token.type for token in tokens] == [token.type for token in uncoalesced]
+
+
+def test_illegal_runs_past_the_cap_are_only_counted(tokenizer):
+    source = "\x01" * 200_000 + " x = 1;"
+    for engine in tokenizer.LEXER_ENGINES:
+        for coalesce_errors, suppressed in ((True, 0), (False, 199_998)):
+            lexer = tokenizer.Lexer("source.lit", source, engine, coalesce_errors=coalesce_errors, max_errors=2)
+            tracemalloc.start()
+            try:
+                tokens, errors = lexer.make_tokens()
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            assert len(errors) == (1 if coalesce_errors else 2)
+            assert lexer.suppressed_errors == suppressed
+            assert len(tokens) >= 4
+            # One error spanning the run holds its text twice; one object per
+            # character would take well over 100 bytes each.
+            assert peak < 2_000_000, (engine, coalesce_errors, peak)
+
+
+def test_lex_parallel_matches_make_tokens_across_any_split(lexical_tokenizer):
+    statements = 'a = 1;\n' * 40
+    # Each middle section is full of ';\n' split marks that lie inside a
+    # string, a comment or an unclosed string, so the guess that a segment
+    # starts after a SEMICOLON is wrong for the segments that start there.
+    middles = ['println("' + 'x;\n' * 40 + '");\n', '## ' + 'y;\n' * 40 + ' ##\n', '"' + 'z;\n' * 40]
+    for middle in middles:
+        source = statements + middle + statements
+        expected = lexed(lexical_tokenizer, source)
+        for workers in (2, 3, 4, 7):
+            assert as_tuples(*lexical_tokenizer.lex_parallel("source.lit", source, workers)) == expected, \
+                (middle, workers)
+
+
+def test_relex_matches_a_full_relex(syntax_tokenizer):
+    rng = random.Random(8)
+    snippets = ["", " ", "x", "1", ".", ";", '"', "'", "#", "##", "{", "int", "else", "\n", "2.5", "a{b}"]
+    for engine in syntax_tokenizer.LEXER_ENGINES:
+        for _ in range(200):
+            edit_start = rng.randrange(len(SAMPLE) + 1)
+            edit_end = min(len(SAMPLE), edit_start + rng.randrange(6))
+            new_text = rng.choice(snippets)
+            lexer = syntax_tokenizer.Lexer("source.lit", SAMPLE, engine)
+            previous = list(lexer.iter_tokens())
+            edited = SAMPLE[:edit_start] + new_text + SAMPLE[edit_end:]
+            relexed = lexer.relex(previous, edit_start, edit_end, new_text)
+            expected = syntax_tokenizer.Lexer("source.lit", edited, engine).iter_tokens()
+            assert scanned(relexed) == scanned(expected), (engine, edited)
+
+
+def test_char_engine_builds_positions_only_for_tokens(syntax_tokenizer, monkeypatch):
+    built = []
+
+    class CountedPosition(syntax_tokenizer.Position):
+        __slots__ = ()
+
+        def __init__(self, idx, lines):
+            built.append(idx)
+            super().__init__(idx, lines)
+
+    monkeypatch.setattr(syntax_tokenizer, "Position", CountedPosition)
+    tokens, errors = syntax_tokenizer.Lexer("source.lit", "x" + " \n\t" * 1000 + "= 1;").make_tokens()
+    assert len(tokens) == 4 and not errors
+    assert len(built) <= 4 * len(tokens)
+
+
+def test_token_buffer_matches_make_tokens(syntax_tokenizer):
+    sources = [SAMPLE, "", "x = \"open string\ny = 1;", "12abc 1.2.3 .5e-3", "a ?? b", "x = -1 - -2;"]
+    for source in sources:
+        buffer, errors = syntax_tokenizer.Lexer("source.lit", source).make_token_buffer()
+        tokens, expected_errors = syntax_tokenizer.Lexer("source.lit", source).make_tokens()
+        assert [(view.type, view.value) for view in buffer] == [(token.type, token.value) for token in tokens]
+        assert as_tuples([], errors) == as_tuples([], expected_errors)
+        # Sub-tokens share their Token's span but get their own in the buffer.
+        for view, token in zip(buffer, tokens):
+            assert token.pos_start.idx <= view.pos_start.idx <= view.pos_end.idx <= token.pos_end.idx, source
+    assert buffer.kinds.itemsize + buffer.starts.itemsize + buffer.ends.itemsize < 20
+
+
+def test_identifiers_are_interned(tokenizer):
+    source = 'alpha = beta + alpha; alpha.x; println("{alpha}");'
+    for engine in tokenizer.LEXER_ENGINES:
+        tokens, _ = tokenizer.Lexer("source.lit", source, engine).make_tokens()
+        assert len({id(token.value) for token in tokens if token.value == 'alpha'}) == 1, engine
+        assert all(token.type is tokenizer.TOKEN_KINDS[token.kind] for token in tokens), engine
+        first, _ = tokenizer.Lexer("source.lit", source, engine, lexemes=tokenizer.LEXEMES).make_tokens()
+        second, _ = tokenizer.Lexer("source.lit", source, engine, lexemes=tokenizer.LEXEMES).make_tokens()
+        assert first[0].value is second[0].value is tokenizer.LEXEMES['alpha'], engine
+
+
+def test_instrumented_lexer_counts_each_category(tokenizer):
+    source = 'int x = 1;\ny = "s"; ?'
+    lexer = tokenizer.InstrumentedLexer("source.lit", source)
+    lexer.make_tokens()
+    figures = lexer.instrumentation()
+    categories = figures['categories']
+    assert set(categories) == set(tokenizer.LEXER_CATEGORIES)
+    assert sum(stats['chars'] for stats in categories.values()) == len(source)
+    assert {category: stats['count'] for category, stats in categories.items() if stats['count']} == \
+        {'whitespace': 7, 'symbol': 4, 'number': 1, 'identifier': 3, 'string': 1, 'illegal': 1}
+    assert categories['string']['chars'] == 3
+    assert all(stats['seconds'] >= 0 for stats in categories.values())
+    assert sum(figures['lexeme_lengths'].values()) > 0
+    with pytest.raises(ValueError):
+        tokenizer.InstrumentedLexer("source.lit", source, 'regex')
+
+
+def test_word_token_pairs_are_cached_across_lexers(tokenizer):
+    source = "zebrainteger = zebrainteger + 1;"
+    before = tokenizer.word_token_pairs.cache_info()
+    tokens, _ = tokenizer.Lexer("source.lit", source).make_tokens()
+    tokenizer.Lexer("source.lit", source).make_tokens()
+    after = tokenizer.word_token_pairs.cache_info()
+    assert after.misses - before.misses <= 1
+    assert after.hits - before.hits >= 3
+    assert tokenizer.word_token_pairs("zebrainteger") == (('NOISE_WORD', 'eger'), ('IDENTIFIER', 'zebrainteger'))
+    assert [(token.type, token.value) for token in tokens[:2]] == list(tokenizer.word_token_pairs("zebrainteger"))